@@ -4,6 +4,7 @@ from PyQt6.QtGui import QPalette, QColor
 import pyrebase
 
 from src.core.logic.firebase_crud import FirebaseCRUD
+from src.core.gestures.calibration_profile import CalibrationProfile, CalibrationStore
 from src.components.login import UserAuth
 from src.components.user_page import UserPage
 from src.components.register import Register
@@ -19,6 +20,9 @@ class AuthHandler(QMainWindow):
         self.current_user = None
         self.fdb = FirebaseCRUD()
         self.settings = QSettings("Th1nkItThr0", "Dr1veThr0")
+        # Finger and wink thresholds of the logged-in player, defaults until then
+        self.calibration_store = CalibrationStore(self.settings)
+        self.calibration_profile = CalibrationProfile()
         self.setup_ui()
         self.stacked_layout_initialization()
         self.load_session()
@@ -88,12 +92,23 @@ class AuthHandler(QMainWindow):
     def set_current_user(self, user):
         self.current_user = user
         self.settings.setValue("refresh_token", user['refreshToken'])
+        self.calibration_profile = self.calibration_store.load(user['localId'])
 
     def get_current_user(self):
         return self.current_user
 
+    def get_calibration_profile(self):
+        return self.calibration_profile
+
+    def save_calibration_profile(self, profile):
+        """Make `profile` the current player's profile and cache it for their next sessions"""
+        self.calibration_profile = profile
+        if self.current_user:
+            self.calibration_store.save(self.current_user['localId'], profile)
+
     def logout(self):
         self.current_user = None
+        self.calibration_profile = CalibrationProfile()
         self.settings.remove("refresh_token")
         self.switch_to_login()
     def is_user_logged_in(self):
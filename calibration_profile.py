@@ -0,0 +1,148 @@
+# per-player finger and wink thresholds, fitted from short landmark recordings
+import json
+
+import numpy as np
+
+from src.core.gestures.landmarks_dictionary import Y, THUMB_TIP, THUMB_IP
+from src.core.gestures.landmark_recording import LandmarkRecording, MAX_HANDS
+from src.core.gestures.methods.finger_classifier import JointAngleClassifier
+from src.core.gestures.wink_detector import eye_aspect_ratios
+
+# Fewer samples than this for a pose and its thresholds keep their defaults
+MIN_SAMPLES = 10
+
+
+class CalibrationProfile:
+    """Thresholds of the finger classifiers and the wink detector for one player"""
+    FIELDS = ("finger_bend_threshold", "thumb_bend_threshold", "thumb_threshold",
+              "ear_threshold", "wink_confirm_ms")
+
+    def __init__(self, finger_bend_threshold=80.0, thumb_bend_threshold=50.0, thumb_threshold=0.045,
+                 ear_threshold=0.2, wink_confirm_ms=66.0):
+        self.finger_bend_threshold = finger_bend_threshold
+        self.thumb_bend_threshold = thumb_bend_threshold
+        self.thumb_threshold = thumb_threshold
+        self.ear_threshold = ear_threshold
+        self.wink_confirm_ms = wink_confirm_ms
+        # Threshold groups ("fingers", "winks") fit() kept at their defaults, not saved
+        self.skipped = []
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Profile from a saved dict, unknown keys are ignored and missing ones keep their defaults"""
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    def apply_to_classifier(self, classifier):
+        """Set the thresholds a finger classifier uses (JointAngleClassifier or FingerStateClassifier)"""
+        for field in ("finger_bend_threshold", "thumb_bend_threshold", "thumb_threshold"):
+            if hasattr(classifier, field):
+                setattr(classifier, field, getattr(self, field))
+
+    def apply_to_wink_detector(self, wink_detector):
+        wink_detector.EAR_THRESHOLD = self.ear_threshold
+        wink_detector.confirm_ms = self.wink_confirm_ms
+
+    @classmethod
+    def fit(cls, open_hands_path, fists_path, eyes_open_path, winks_path, current=None):
+        """Fit a profile from four recordings of the calibration poses
+
+        Each threshold is put halfway between the two poses it separates;
+        a threshold whose recordings hold too few samples keeps its value in
+        `current` (the player's profile so far, defaults without one) and
+        its group is listed in the profile's `skipped`.
+        """
+        profile = cls() if current is None else cls.from_dict(current.to_dict())
+        classifier = JointAngleClassifier()
+
+        open_hands_recording = LandmarkRecording(open_hands_path)
+        classifier.set_frame_size(open_hands_recording.width, open_hands_recording.height)
+        open_hands = _recorded_hands(open_hands_recording)
+        fists = _recorded_hands(LandmarkRecording(fists_path))
+        if len(open_hands) >= MIN_SAMPLES and len(fists) >= MIN_SAMPLES:
+            # Bend of the two outer joints of every finger, (N, 5)
+            open_bend = classifier.joint_angles(open_hands)[:, :, 1:].sum(axis=-1)
+            fist_bend = classifier.joint_angles(fists)[:, :, 1:].sum(axis=-1)
+            profile.finger_bend_threshold = _midpoint(
+                np.percentile(open_bend[:, 1:], 95), np.percentile(fist_bend[:, 1:], 5), 40.0, 140.0)
+            profile.thumb_bend_threshold = _midpoint(
+                np.percentile(open_bend[:, 0], 95), np.percentile(fist_bend[:, 0], 5), 20.0, 120.0)
+
+            open_gap = np.abs(open_hands[:, THUMB_TIP, Y] - open_hands[:, THUMB_IP, Y])
+            fist_gap = np.abs(fists[:, THUMB_TIP, Y] - fists[:, THUMB_IP, Y])
+            profile.thumb_threshold = _midpoint(
+                np.percentile(open_gap, 10), np.percentile(fist_gap, 90), 0.01, 0.1)
+        else:
+            profile.skipped.append("fingers")
+
+        eyes_open, _ = _recorded_ears(LandmarkRecording(eyes_open_path))
+        winks, wink_times = _recorded_ears(LandmarkRecording(winks_path))
+        if len(eyes_open) >= MIN_SAMPLES and len(winks) >= MIN_SAMPLES:
+            # Winks are a minority of the wink recording's frames, its low tail
+            # of the smaller eye is the closed eye
+            closed = np.percentile(winks.min(axis=1), 10)
+            profile.ear_threshold = _midpoint(np.percentile(eyes_open, 10), closed, 0.1, 0.35)
+
+            one_eye_closed = (winks < profile.ear_threshold).sum(axis=1) == 1
+            durations = _run_durations(one_eye_closed, wink_times)
+            if durations:
+                # Well within most of the player's winks, so they still confirm
+                profile.wink_confirm_ms = float(np.clip(np.percentile(durations, 25) * 1000 * 0.6, 30.0, 200.0))
+        else:
+            profile.skipped.append("winks")
+        return profile
+
+
+class CalibrationStore:
+    """Keeps every player's profile in the app settings, keyed by their user id"""
+    def __init__(self, settings):
+        # A QSettings (or anything with value/setValue/remove)
+        self.settings = settings
+
+    def _key(self, user_id):
+        return f"calibration/{user_id}"
+
+    def load(self, user_id):
+        """The player's saved profile, the default profile when there is none"""
+        saved = self.settings.value(self._key(user_id), defaultValue=None)
+        if not saved:
+            return CalibrationProfile()
+        try:
+            return CalibrationProfile.from_dict(json.loads(saved))
+        except (ValueError, TypeError):
+            print(f"Ignoring unreadable calibration profile of {user_id}")
+            return CalibrationProfile()
+
+    def save(self, user_id, profile):
+        self.settings.setValue(self._key(user_id), json.dumps(profile.to_dict()))
+
+    def remove(self, user_id):
+        self.settings.remove(self._key(user_id))
+
+
+def _recorded_hands(recording):
+    """Every recorded hand as one (N, 21, 3) float32 array"""
+    frames = recording.frames
+    present = np.arange(MAX_HANDS) < frames["hand_count"][:, np.newaxis]
+    return frames["hands"][present].astype(np.float32)
+
+
+def _recorded_ears(recording):
+    """(N, 2) left and right EAR and (N,) timestamps of every frame with a face"""
+    frames = recording.frames
+    face_found = frames["face_found"].astype(bool)
+    return eye_aspect_ratios(frames["eyes"][face_found], recording.width, recording.height), \
+        frames["timestamp"][face_found]
+
+
+def _midpoint(low, high, minimum, maximum):
+    return float(np.clip((low + high) / 2, minimum, maximum))
+
+
+def _run_durations(mask, timestamps):
+    """Seconds from the first to the last frame of every run of True in a boolean array"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+    return (timestamps[ends] - timestamps[starts]).tolist()
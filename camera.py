@@ -1,35 +1,56 @@
 # the widget of the camera
+import os
 import sys
-import cv2
-import mediapipe as mp
+import time
 import math
 
-from PyQt6.QtWidgets import QMainWindow, QWidget, QLabel, QVBoxLayout, QSizePolicy
-from PyQt6.QtCore import Qt, QTimer 
-from PyQt6.QtGui import QImage, QPixmap
-
-from src.core.gestures.wink_detector import WinkDetector
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QSizePolicy
+from PyQt6.QtCore import Qt, pyqtSignal
 
 from src.core.logic.abstract_functions import get_resource_path
 
-from src.core.gestures.gesture_decoder import GestureDecoder
+from src.core.capture.frame_grabber import FrameGrabber
+from src.core.capture.frame_source import open_frame_source
+from src.core.gestures.inference_worker import InferenceWorker
+from src.core.logic.stage_timer import StageTimer
+from src.core.gestures.model_registry import model_registry
+from src.core.gestures.gesture_code import GestureCode
+from src.core.gestures.hold_confirmer import HoldConfirmer
 from src.components.overlay_label import OverlayLabel
+from src.components.camera_preview import CameraPreview
 
 class Camera_Widget(QWidget):
-    def __init__(self, parent=None, code=None):
+    # Path of a landmark recording once the worker has closed its file
+    recording_closed = pyqtSignal(str)
+
+    def __init__(self, parent=None, code=None, inference_size=None, frame_source=None):
         super().__init__(parent)
         self.resize(550, 500)
 
         self.true_code = code
         self.number_of_hands = 1
         self.validation_method = "click"
+        # Fewest hands a code needs before a hold confirms it
+        self.required_hands = 1
         self.parent = parent
 
-        self.wink_detector = WinkDetector()
-        self.previous_wink_detection = False
-        # Initialize camera
-        self.capture = cv2.VideoCapture(0)
-        if not self.capture.isOpened():
+        self.previous_wink_detection = None
+        # Confirms a code held steady when validating with "hold"
+        self.hold_confirmer = HoldConfirmer()
+
+        # Per-stage latency percentiles, written to a file on close (or exit)
+        # when DRIVETHRU_STAGE_TIMINGS points to one
+        self.stage_timer = StageTimer()
+        self.timings_path = os.getenv("DRIVETHRU_STAGE_TIMINGS")
+        if self.timings_path:
+            self.stage_timer.dump_on_exit(self.timings_path)
+
+        # Initialize camera, DRIVETHRU_FRAME_SOURCE replays footage or an
+        # image directory instead (e.g. on machines without a webcam)
+        if frame_source is None:
+            frame_source = open_frame_source(os.getenv("DRIVETHRU_FRAME_SOURCE", "0"), loop=True)
+        self.frame_source = frame_source
+        if not self.frame_source.is_opened():
             raise IOError("Failed to open camera. Please check permissions.")
 
         # Set up layout
@@ -40,11 +61,8 @@ class Camera_Widget(QWidget):
 
         self.setLayout(main_layout)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
-        # Image label for camera feed
-        self.image_label = QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        self.image_label.resize(500, 400)
-        self.image_label.setStyleSheet("border: 2px solid black;")
+        # Preview widget for camera feed
+        self.preview = CameraPreview(width=500, height=400, stage_timer=self.stage_timer)
         
         # Result text label
         text_image_path = get_resource_path("img/gesture_label.jpg")
@@ -54,39 +72,36 @@ class Camera_Widget(QWidget):
         self.resultText_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         self.resultText_label.setStyleSheet("background-color: rgba(255, 255, 255, 0);")  # Make background transparent
         
-        main_layout.addWidget(self.image_label, alignment=Qt.AlignmentFlag.AlignHCenter)
+        main_layout.addWidget(self.preview, alignment=Qt.AlignmentFlag.AlignHCenter)
         main_layout.addWidget(self.resultText_label, alignment=Qt.AlignmentFlag.AlignHCenter)
 
-        # Start timer to update the frame
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)  # Update every 30 ms
-        
-        # Set up mediapipe
-        self.mp_hands = mp.solutions.hands
-        self.initialize_hands_detector()
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.gesture_decoder = GestureDecoder()
-        
-        # Store previous gestures to avoid redundant updates
-        self.current_gesture = None
+        # GestureCode of the visible hands, the hand on the left of the
+        # preview in the high bits
+        self.current_code = None
+        # (value, hands, game mode) of the code the label currently shows
+        self.shown_key = None
+        # Stability (0-1) and hold time (ms) of the currently shown code
+        self.current_confidence = 0.0
+        self.current_held_ms = 0.0
         
         # Keep track of detected hands count for UI adjustments
         self.detected_hands_count = 0
 
-    def initialize_hands_detector(self):
-        """Initialize or reinitialize the MediaPipe Hands detector with current settings"""
-        # Close existing hands detector if it exists
-        if hasattr(self, 'hands'):
-            self.hands.close()
-            
-        # Create a new hands detector with current settings
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=self.number_of_hands,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+        # Read the camera on its own thread so a slow webcam never blocks the GUI
+        self.frame_grabber = FrameGrabber(self.frame_source, self.stage_timer)
+        # Run mediapipe on a worker thread, results come back as queued signals
+        # inference_size (width, height) downscales frames before mediapipe
+        self.inference_worker = InferenceWorker(
+            self.frame_grabber.slot, self.number_of_hands, inference_size,
+            preview_size=(self.preview.width(), self.preview.height()),
+            stage_timer=self.stage_timer)
+        self.inference_worker.results_ready.connect(
+            self.update_frame, Qt.ConnectionType.QueuedConnection)
+        self.inference_worker.recording_closed.connect(
+            self.recording_closed, Qt.ConnectionType.QueuedConnection)
+        self.inference_worker.start()
+        self.frame_grabber.start()
+        self._shut_down = False
     
     def update_true_code(self, new_code):
         """Update the widget with a new binary code"""
@@ -94,13 +109,69 @@ class Camera_Widget(QWidget):
         # Reset previous gestures to force a UI update
         print(f"Camera code updated to: {new_code}")
 
+    def set_validation_method(self, validation_method, required_hands=1):
+        """Set how the code is validated ("click", "wink" or "hold"), face mesh only runs for wink validation
+
+        `required_hands` is the fewest hands a held code needs to be confirmed.
+        """
+        self.validation_method = validation_method
+        self.required_hands = required_hands
+        self.hold_confirmer.reset()
+        self.inference_worker.scheduler.configure_for_validation(validation_method)
+
+    def can_validate(self):
+        """Whether a wink or a held code may validate the shown code right now, never while paused or calibrating"""
+        return hasattr(self.parent, 'validate_current_code')\
+            and hasattr(self.parent, 'remaining_time')\
+            and self.parent.remaining_time > 0\
+            and hasattr(self.parent, 'current_scene') \
+            and self.parent.current_scene == "kitchen"\
+            and hasattr(self.parent, 'elaborate_answer')\
+            and self.parent.elaborate_answer.isHidden()\
+            and getattr(self.parent, 'game_playing', True)\
+            and getattr(self.parent, 'calibration', None) is None
+
+    def set_inference_size(self, inference_size):
+        """Set the (width, height) mediapipe runs at, None for the camera resolution"""
+        self.inference_worker.set_inference_size(inference_size)
+
+    def start_recording(self, path):
+        """Record hand and eye landmarks of every processed frame to `path` for offline replay"""
+        self.inference_worker.start_recording(path)
+
+    def stop_recording(self):
+        """Stop recording, recording_closed is emitted once the file is complete"""
+        self.inference_worker.stop_recording()
+
+    def set_face_mesh_enabled(self, enabled):
+        """Run face landmarking regardless of the validation method, e.g. while calibrating the eyes"""
+        self.inference_worker.scheduler.set_enabled("face_mesh", enabled)
+
+    def is_face_mesh_enabled(self):
+        return self.inference_worker.scheduler.is_enabled("face_mesh")
+
+    def set_wink_mode(self, mode):
+        """Switch wink detection between "full" and the cheaper "eye_region" FaceMesh"""
+        self.inference_worker.set_wink_mode(mode)
+
+    def set_backend(self, backend):
+        """Find hands and face with separate Hands and FaceMesh ("separate") or one Holistic pass ("holistic")
+
+        Holistic only pays off with wink validation, in the other modes the separate Hands model runs.
+        """
+        self.inference_worker.set_backend(backend)
+
+    def set_calibration_profile(self, profile):
+        """Use the player's CalibrationProfile finger and wink thresholds"""
+        self.inference_worker.set_calibration_profile(profile)
+
     def update_number_of_hands(self, new_number_of_hands):
         """Update the widget with a new number of hands"""
         self.number_of_hands = new_number_of_hands
         # Reinitialize the hands detector with the new number of hands
-        self.initialize_hands_detector()
+        self.inference_worker.set_number_of_hands(new_number_of_hands)
         if self.number_of_hands == 2:
-            self.wink_detector.__init__()
+            self.inference_worker.reset_wink_detector()
         print(f"Number of hands updated to: {new_number_of_hands}")
     
     def update_result_label_size(self, hands_count):
@@ -114,114 +185,109 @@ class Camera_Widget(QWidget):
             else:
                 self.resultText_label.setFixedSize(200, 80)
 
-    def ResultInText(self, list_data):
-        if not list_data:
+    def ResultInText(self, code):
+        if code is None:
             self.resultText_label.setText("")
             return
 
-        # Reverse the gestures to display them in the correctly
-        list_data = [gesture[::-1] for gesture in list_data]
+        display = code.display()
         if self.parent.current_game_mode == "reverse":
-            # Count open fingers per hand
-            finger_counts = [sum(gesture) for gesture in list_data]
-
-            # If exactly two hands are detected, sum both (e.g., 2 + 5 = 7)
-            if len(finger_counts) == 2:
-                total = sum(finger_counts)
-                result_string = str(total)
-            else:
-                # Show individual counts separated by space (for 1 or more than 2 hands)
-                result_string = ' '.join(str(count) for count in finger_counts)
+            # Finger count per hand, summed when two hands are shown (e.g. 2 + 5 = 7)
+            result_string = display.count_label
         else:
-            # For other modes: convert each gesture to binary string, e.g., [1,0,0,1,0] -> "10010"
-            gesture_strings = [''.join(str(bit) for bit in gesture) for gesture in list_data]
-            result_string = ' '.join(gesture_strings)
+            # For other modes: pinky to thumb of every hand, e.g. "10010"
+            result_string = display.label
 
         self.resultText_label.setText(result_string)
     
-    def update_frame(self):
-        # Read a frame from the camera
-        ret, frame = self.capture.read()
-        if not ret:
-            return
-        # Convert the frame from BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        # Process the frame with Mediapipe Hands
-        self.results = self.hands.process(frame_rgb)
-        # Draw hand landmarks on the frame and detect gestures
-        multi_hand_gestures = []
-
-        if self.results.multi_hand_landmarks:
-            for landmarks in self.results.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks\
-                (frame_rgb, landmarks, self.mp_hands.HAND_CONNECTIONS)
-                gesture = self.gesture_decoder.detect_gestures(landmarks)
-                if gesture:
-                    multi_hand_gestures.append(gesture)
-
-        self.current_wink_detection = self.wink_detector.detect_wink(frame)
+    def update_frame(self, result):
+        """Render an InferenceResult published by the inference worker"""
+        render_start = time.perf_counter()
+        # Capture to GUI latency, includes the wait in the signal queue
+        self.stage_timer.record_ms("capture_to_render", (time.monotonic() - result.frame.captured_at) * 1000)
+        # Show the stabilized codes, not whatever the last single frame said,
+        # in slot order so the two hands never swap places
+        self.current_code = GestureCode.from_hand_codes(result.stable_codes)
+        self.current_confidence = min(
+            (confidence for code, confidence in zip(result.stable_codes, result.confidence) if code is not None),
+            default=0.0)
+        self.current_held_ms = min(
+            (held for code, held in zip(result.stable_codes, result.held_ms) if code is not None),
+            default=0.0)
+
+        # A WinkEvent on the frame the wink was confirmed, None otherwise
+        self.current_wink_detection = result.wink
         if self.current_wink_detection != self.previous_wink_detection:
-            if self.validation_method == "wink" and self.current_wink_detection:
-                if hasattr(self.parent, 'validate_current_code')\
-                    and hasattr(self.parent, 'remaining_time')\
-                    and self.parent.remaining_time > 0\
-                    and hasattr(self.parent, 'current_scene') \
-                    and self.parent.current_scene == "kitchen"\
-                    and hasattr(self.parent, 'elaborate_answer')\
-                    and self.parent.elaborate_answer.isHidden():
-                        self.parent.validate_current_code()                    
-               
-        # Update UI label size based on number of hands
-        self.update_result_label_size(len(multi_hand_gestures))
+            if self.validation_method == "wink" and self.current_wink_detection and self.can_validate():
+                self.parent.validate_current_code()
+                if result.wink.onset_captured_at is not None:
+                    # Eye closed to answer shown, includes the confirmation window
+                    self.stage_timer.record_ms(
+                        "wink_to_validate", (time.monotonic() - result.wink.onset_captured_at) * 1000)
+
+        # Hands-only validation: holding the stable code of every hand confirms it,
+        # counted from when validating is possible
+        if self.validation_method == "hold":
+            if not self.can_validate():
+                self.hold_confirmer.reset()
+            elif self.hold_confirmer.update(self.current_code, self.current_held_ms, self.current_confidence,
+                                            self.required_hands):
+                self.parent.validate_current_code()
 
-        # Always update current_gesture
-        self.current_gesture = multi_hand_gestures if multi_hand_gestures else []
+        # Update UI label size based on number of hands
         self.previous_wink_detection = self.current_wink_detection
 
-        # Show raw gesture data in label
-        if multi_hand_gestures:
-            self.ResultInText(self.current_gesture)
-        else:
-            self.resultText_label.setText("")
+        # Only touch the label when the stabilized code (or the mode) changes
+        code = self.current_code
+        shown_key = None if code is None else (code.value, code.hands, self.parent.current_game_mode)
+        if shown_key != self.shown_key:
+            self.shown_key = shown_key
+            self.update_result_label_size(code.hands if code is not None else 0)
+            self.ResultInText(code)
             
-        # Convert the frame to a QImage
-        height, width, channel = frame_rgb.shape
-        bytes_per_line = 3 * width
-        qt_image = QImage(
-            frame_rgb.data,
-            width, 
-            height, 
-            bytes_per_line, 
-            QImage.Format.Format_RGB888)
-        
-        pixmap = QPixmap.fromImage(qt_image)
-        scaled_pixmap = pixmap.scaled(
-            self.image_label.width(),
-            self.image_label.height(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation)
-        
-        # Display the image
-        self.image_label.setPixmap(scaled_pixmap)
+        # Paint the pre-scaled preview buffer directly, then let the worker go on
+        self.preview.set_frame(result.frame)
+        self.inference_worker.result_taken()
+        self.stage_timer.record("render", render_start)
 
     def get_currently_shown_code(self):
-        """Returns the current gesture(s) as a formatted string"""
-        if not hasattr(self, 'current_gesture') or not self.current_gesture:
-            return ""
+        """Returns the GestureCode of the visible hands, None when no hand is shown"""
+        print(f"Current code: {self.current_code}")
+        return self.current_code
+
+    def get_code_stability(self):
+        """Returns the confidence (0-1) and hold time in ms of the currently shown code"""
+        return self.current_confidence, self.current_held_ms
 
-        # Convert each gesture list to a binary string
-        gesture_strings = [''.join(str(bit) for bit in gesture) for gesture in self.current_gesture]
+    def get_frame_counters(self):
+        """Returns the captured, dropped and consumed frame counters of the capture thread"""
+        return self.frame_grabber.slot.get_counters()
 
-        # Join with space if multiple hands
-        result = ' '.join(gesture_strings)
-        #flip the result array
-        result = result[::-1]
-        print(f"Current code: {result}")
-        return result
+    def get_frame_pacing_stats(self):
+        """Returns the measured camera FPS, frame interval jitter and duplicate frame count"""
+        return self.frame_grabber.pacer.get_stats()
+
+    def get_stage_latencies(self):
+        """Returns p50/p95/p99 latencies in ms for every pipeline stage"""
+        return self.stage_timer.percentiles()
+
+    def get_model_report(self):
+        """Returns load time and resident memory of every loaded mediapipe model"""
+        return model_registry.report()
+
+    def shutdown(self):
+        """Stop capture and inference and release the camera and models, safe to call more than once"""
+        if self._shut_down:
+            return
+        self._shut_down = True
+        self.frame_grabber.stop()
+        self.inference_worker.stop()
+        self.frame_source.release()
+        if self.timings_path:
+            # Written now so a closed session never overwrites the running one at exit
+            self.stage_timer.dump(self.timings_path)
+            self.stage_timer.cancel_dump_on_exit()
 
     def closeEvent(self, event):
-        self.timer.stop()
-        if hasattr(self, 'hands'):
-            self.hands.close()
-        self.capture.release()
+        self.shutdown()
         event.accept()
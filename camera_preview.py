@@ -0,0 +1,44 @@
+# paints the camera feed straight from the pipeline's preview buffer
+import time
+
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtGui import QImage, QPainter, QPen, QColor
+
+
+class CameraPreview(QWidget):
+    def __init__(self, parent=None, width=500, height=400, stage_timer=None):
+        super().__init__(parent)
+        self.stage_timer = stage_timer
+        self.setFixedSize(width, height)
+        self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        self.border_pen = QPen(QColor("black"), 2)
+        self._frame = None
+        self._image = None
+
+    def set_frame(self, frame):
+        """Show a FrameContext's preview buffer, already scaled to fit the widget
+
+        The QImage wraps the pooled buffer without a copy. It stays valid
+        because the worker only reuses it after size - 1 newer frames were
+        handed to this widget (see FrameContextPool and InferenceWorker.result_taken).
+        """
+        frame_rgb = frame.preview_rgb
+        height, width = frame_rgb.shape[:2]
+        # Keep the context, and with it the buffer the QImage wraps, until the next frame
+        self._frame = frame
+        self._image = QImage(frame_rgb.data, width, height, frame_rgb.strides[0], QImage.Format.Format_RGB888)
+        self.update()
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        painter = QPainter(self)
+        if self._image is not None:
+            # Center the frame, the buffer already has the widget's aspect-fit size
+            x = (self.width() - self._image.width()) // 2
+            y = (self.height() - self._image.height()) // 2
+            painter.drawImage(x, y, self._image)
+        painter.setPen(self.border_pen)
+        painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+        painter.end()
+        if self.stage_timer is not None:
+            self.stage_timer.record("paint", start)
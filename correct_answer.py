@@ -77,16 +77,12 @@ class CorrectAnswerOverlay(QWidget):
     
     def update_code(self, code, current_game_mode=None):
         """Update the displayed code"""
-        if code:
+        if code is not None:
             if current_game_mode == "default" or current_game_mode == "double_trouble" or current_game_mode == "speedrun":
-                decimal_code = self.binary_array_to_decimal(code)
-                binary_code = self.binary_array_to_binary_number(code)
-                self.code_label.setText(f"{decimal_code}<sub>(10)</sub>  →  {binary_code}<sub>(2)</sub>")
+                self.code_label.setText(f"{int(code)}<sub>(10)</sub>  →  {code.binary()}<sub>(2)</sub>")
 
             elif current_game_mode == "reverse":
-                decimal_code = code
-                binary_code = self.decimal_to_binary(code)
-                self.code_label.setText(f"{binary_code}<sub>(2)</sub>  →  {decimal_code}<sub>(10)</sub>")
+                self.code_label.setText(f"{code.binary()}<sub>(2)</sub>  →  {int(code)}<sub>(10)</sub>")
 
             # Make sure rich text rendering is enabled
             self.code_label.setTextFormat(Qt.TextFormat.RichText)
@@ -95,18 +91,3 @@ class CorrectAnswerOverlay(QWidget):
             font.setPointSize(int(self.height * 0.03))  # 3% of height
             font.setFamily("Comic Sans MS")
             self.code_label.setFont(font)
-
-    def binary_array_to_decimal(self, binary_array):
-        """Eles a binary array of size 5 to a decimal number"""
-        decimal = int("".join(str(bit) for bit in binary_array), 2)
-        return decimal
-    
-    def binary_array_to_binary_number(self, binary_array):
-        """Convert a binary array of size 5 to a binary number"""
-        binary_number = "".join(str(bit) for bit in binary_array)
-        return binary_number
-    
-    def decimal_to_binary(self, decimal):
-        """Convert a decimal number to a binary array of size 5"""
-        binary = bin(decimal)[2:].zfill(5)
-        return binary
\ No newline at end of file
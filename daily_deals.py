@@ -7,6 +7,7 @@ from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
 
 from src.core.logic.abstract_functions import get_resource_path
+from src.core.gestures.gesture_code import GestureCode
 
 class DailyDealsLabel(QLabel):
     def __init__(self, parent=None, current_game_mode=None):
@@ -27,24 +28,6 @@ class DailyDealsLabel(QLabel):
         
         self.show()
 
-    def decimal_array_to_binary_array(self, decimal_array):
-        binary_array = []
-        for decimal_value in decimal_array:
-            # Convert to binary and remove '0b' prefix
-            binary_value = bin(decimal_value)[2:]
-            
-            # Pad to ensure at least 5 bits (since we'll keep the last 4 bits)
-            binary_value = binary_value.zfill(5)
-            
-            # If longer than 5 bits, take the last 5 bits
-            if len(binary_value) > 5:
-                binary_value = binary_value[-5:]
-                
-            binary_array.append(binary_value)
-            print(f"Decimal: {decimal_value}, Binary: {binary_value}")
-        
-        return binary_array
-       
     def load_available_images(self):
         """Load all available menu images from the img directory"""
         try:
@@ -82,14 +65,14 @@ class DailyDealsLabel(QLabel):
     def randomize_one_handed_codes(self):
         """Generate random codes for one-handed mode (range 1-31)"""
         try:
-            self.codes = random.sample(range(1, 32), 5)
+            self.codes = [GestureCode(value) for value in random.sample(range(1, 32), 5)]
         except ValueError as e:
             return
 
     def randomize_double_trouble_codes(self):
         """Generate random codes for two-handed mode (range 32-1023)"""
         try:
-            self.codes = random.sample(range(32, 1024), 5)
+            self.codes = [GestureCode(value, hands=2) for value in random.sample(range(32, 1024), 5)]
             print(f"Two-handed codes: {self.codes}")
         except ValueError as e:
             return
@@ -97,8 +80,8 @@ class DailyDealsLabel(QLabel):
     def randomize_reverse_codes(self):
         """Generate random codes for reverse mode (range 1-10)"""
         try:
-            self.codes = random.sample(range(1, 11), 5)  # Changed to range(1, 11) to include 10
-            self.codes = self.decimal_array_to_binary_array(self.codes)
+            # The finger count to show, written as a 5-bit code
+            self.codes = [GestureCode(value) for value in random.sample(range(1, 11), 5)]  # Changed to range(1, 11) to include 10
         except ValueError as e:
            return
         
@@ -181,7 +164,8 @@ class DailyDealsLabel(QLabel):
                 
                 # Add the code
                 try:
-                    code_label = QLabel(str(self.codes[i]))
+                    code = self.codes[i]
+                    code_label = QLabel(code.binary() if current_game_mode == "reverse" else str(int(code)))
                     code_label.setStyleSheet("""
                         font-family: 'Comic Sans MS';
                         font-size: 28pt;
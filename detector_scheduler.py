@@ -0,0 +1,47 @@
+# decides which detectors run on which frame
+import threading
+
+
+class DetectorScheduler:
+    """Turns detectors on and off per game mode and lets each run at its own frame rate"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> {"enabled": bool, "interval": run every n-th frame, "countdown": frames left}
+        self._detectors = {}
+
+    def register(self, name, enabled=True, interval=1):
+        """Add a detector that runs every `interval` frames while enabled"""
+        with self._lock:
+            self._detectors[name] = {"enabled": enabled, "interval": max(1, interval), "countdown": 0}
+
+    def set_enabled(self, name, enabled):
+        with self._lock:
+            detector = self._detectors[name]
+            if enabled and not detector["enabled"]:
+                # Run on the very next frame once switched back on
+                detector["countdown"] = 0
+            detector["enabled"] = enabled
+
+    def set_interval(self, name, interval):
+        with self._lock:
+            self._detectors[name]["interval"] = max(1, interval)
+
+    def is_enabled(self, name):
+        with self._lock:
+            return self._detectors[name]["enabled"]
+
+    def should_run(self, name):
+        """Advance the detector's frame counter and tell whether it runs on this frame"""
+        with self._lock:
+            detector = self._detectors[name]
+            if not detector["enabled"]:
+                return False
+            if detector["countdown"] > 0:
+                detector["countdown"] -= 1
+                return False
+            detector["countdown"] = detector["interval"] - 1
+            return True
+
+    def configure_for_validation(self, validation_method):
+        """Face mesh is only needed when the player validates with a wink"""
+        self.set_enabled("face_mesh", validation_method == "wink")
@@ -66,14 +66,6 @@ class ElaborateAnswer(QWidget):
         else:
             self.current_game_mode = current_game_mode
 
-    def shown_code_to_decimal(self, binary_string):
-        decimal_number = binary_string.count('1')
-        return decimal_number
-    
-    def binary_array_to_decimal(self, binary_array):
-        decimal = int("".join(str(bit) for bit in binary_array), 2)
-        return decimal
-
     def elaborate(self, true_code, current_code, remaining_time, current_game_mode):
         self.update_code_values(true_code, current_code, remaining_time, current_game_mode)
         print(f"Comparing codes - True: {self.true_code}, Current: {self.current_code} - remaining time: {remaining_time}")
@@ -97,11 +89,14 @@ class ElaborateAnswer(QWidget):
             self.time_is_up_overlay.raise_()
             return
         
+        # Both codes are GestureCodes, the shown one is None without hands
         if self._parent_test.current_game_mode == "reverse":
-            self.current_code = self.shown_code_to_decimal(self.current_code)
-            self.true_code = self.binary_array_to_decimal(self.true_code)
-        
-        if self.true_code == self.current_code:
+            # The code is the number of fingers to raise
+            is_correct = self.current_code is not None and self.current_code.finger_count() == int(self.true_code)
+        else:
+            is_correct = self.true_code == self.current_code
+
+        if is_correct:
             if self._parent_test and hasattr(self._parent_test, 'update_timer'):
                 self._parent_test.update_timer.stop()
             if hasattr(self._parent_test, 'reset_timer'):
@@ -0,0 +1,93 @@
+# keeps face landmarking cropped around the player's eyes
+import math
+
+import numpy as np
+
+# Rows of the outer eye corners in the 12 EYE_LANDMARKS points (263 and 33)
+LEFT_OUTER_CORNER = 3
+RIGHT_OUTER_CORNER = 6
+
+
+class EyeRegionTracker:
+    """Crops the face mesh input to a square around the last known eyes, full-frame search when lost
+
+    The crop is sized from the distance between the outer eye corners, just
+    large enough for FaceMesh to still recognise the face around the eyes.
+    """
+    def __init__(self, spans=2.6, drop=0.3, edge_margin=0.25, full_search_interval=90):
+        # Side of the square crop in eye spans, and how far below the eyes
+        # (in eye spans) its center sits, the eyes are in the upper face
+        self.spans = spans
+        self.drop = drop
+        # The crop only moves once the eyes leave its middle, or the face
+        # gets noticeably closer or further, a still player keeps it still
+        self.edge_margin = edge_margin
+        # Search the whole frame every so often, e.g. when another player steps in
+        self.full_search_interval = full_search_interval
+
+        self.roi = None           # normalized (x0, y0, x1, y1) in full-frame coordinates
+        self._roi_span = None     # eye span in pixels the ROI was fitted to
+        self._crop_roi = None     # pixel-aligned ROI of the crop handed out for this frame
+        self._frames_since_full_search = 0
+
+    def reset(self):
+        """Forget the tracked eyes, the next frame is searched in full"""
+        self.roi = None
+        self._roi_span = None
+        self._crop_roi = None
+        self._frames_since_full_search = 0
+
+    def crop(self, image):
+        """Returns the part of the image FaceMesh should run on"""
+        self._frames_since_full_search += 1
+        if self.roi is None or self._frames_since_full_search >= self.full_search_interval:
+            self._crop_roi = None
+            self._frames_since_full_search = 0
+            return image
+
+        height, width = image.shape[:2]
+        x0, y0, x1, y1 = self.roi
+        left, top = int(x0 * width), int(y0 * height)
+        right, bottom = int(math.ceil(x1 * width)), int(math.ceil(y1 * height))
+        self._crop_roi = (left / width, top / height, right / width, bottom / height)
+        # Mediapipe needs contiguous memory, this only copies the crop
+        return np.ascontiguousarray(image[top:bottom, left:right])
+
+    def update(self, eye_points, width, height):
+        """Map the (12, 3) eye points from the crop to full-frame coordinates (in place) and move the ROI"""
+        if eye_points is None:
+            # Tracking lost, search the whole frame next time
+            self.reset()
+            return
+
+        if self._crop_roi is not None:
+            x0, y0, x1, y1 = self._crop_roi
+            scale_x, scale_y = x1 - x0, y1 - y0
+            eye_points[:, 0] = x0 + eye_points[:, 0] * scale_x
+            eye_points[:, 1] = y0 + eye_points[:, 1] * scale_y
+            # z uses roughly the same scale as x
+            eye_points[:, 2] *= scale_x
+
+        center_x = float(eye_points[:, 0].mean())
+        center_y = float(eye_points[:, 1].mean())
+        corners = eye_points[LEFT_OUTER_CORNER, :2] - eye_points[RIGHT_OUTER_CORNER, :2]
+        span = math.hypot(corners[0] * width, corners[1] * height)
+
+        if self.roi is None or not self._keeps_roi(center_x, center_y, span):
+            half_width = span * self.spans / 2 / width
+            half_height = span * self.spans / 2 / height
+            center_y += span * self.drop / height
+            self.roi = (
+                max(0.0, center_x - half_width),
+                max(0.0, center_y - half_height),
+                min(1.0, center_x + half_width),
+                min(1.0, center_y + half_height)
+            )
+            self._roi_span = span
+
+    def _keeps_roi(self, center_x, center_y, span):
+        x0, y0, x1, y1 = self.roi
+        margin_x = (x1 - x0) * self.edge_margin
+        margin_y = (y1 - y0) * self.edge_margin
+        inside = x0 + margin_x <= center_x <= x1 - margin_x and y0 + margin_y <= center_y <= y1 - margin_y
+        return inside and 0.8 <= span / max(self._roi_span, 1e-6) <= 1.25
@@ -0,0 +1,172 @@
+import numpy as np
+
+from src.core.gestures.landmarks_dictionary import Y, WRIST, THUMB_TIP, THUMB_IP, INDEX_TIP, INDEX_PIP
+
+# Index, middle, ring and pinky landmarks are 4 rows apart, so their tips and
+# pips are plain strided views of the landmark array, no gather needed
+FINGER_TIP_ROWS = slice(INDEX_TIP, None, 4)
+FINGER_PIP_ROWS = slice(INDEX_PIP, None, 4)
+
+# Bit of each finger in a packed code: thumb is bit 0 ... pinky is bit 4
+FINGER_BITS = np.array([1, 2, 4, 8, 16], dtype=np.uint8)
+
+# Hands classified per pass over a batch, bounds the scratch buffers
+CHUNK_SIZE = 65536
+
+# Every finger is a chain wrist -> 4 landmarks (thumb: cmc, mcp, ip, tip;
+# others: mcp, pip, dip, tip). Its 4 bones run from BONE_STARTS to BONE_ENDS,
+# shape (5 fingers, 4 bones), and the 3 joints between them bend
+FINGER_CHAINS = np.array([[WRIST] + list(range(1 + 4 * finger, 5 + 4 * finger)) for finger in range(5)])
+BONE_STARTS = FINGER_CHAINS[:, :-1]
+BONE_ENDS = FINGER_CHAINS[:, 1:]
+
+
+class FingerStateClassifier:
+    """Evaluates all five fingers of N hands at once and packs each hand into a 5-bit code
+
+    Works the same on the 1-2 hands of a live frame and on millions of hands
+    replayed from a recording; scratch buffers are reused between calls.
+    """
+    def __init__(self, thumb_threshold=0.045, capacity=2):
+        self.thumb_threshold = thumb_threshold
+        self._capacity = 0
+        self._reserve(capacity)
+
+    def set_frame_size(self, width, height):
+        """Only vertical distances are compared, the frame's aspect ratio does not matter"""
+
+    def _reserve(self, count):
+        if count <= self._capacity:
+            return
+        self._capacity = count
+        self._fingers_up = np.empty((count, 5), dtype=bool)
+        self._thumb_gap = np.empty(count, dtype=np.float32)
+
+    def classify(self, hands, out=None):
+        """Packed codes (uint8) for an (N, 21, 3) landmark array"""
+        count = len(hands)
+        if out is None:
+            out = np.empty(count, dtype=np.uint8)
+        for start in range(0, count, CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, count)
+            self._classify_chunk(hands[start:end], out[start:end])
+        return out
+
+    def classify_hand(self, hand):
+        """Packed code (int) of a single (21, 3) landmark array"""
+        return int(self.classify(hand[np.newaxis])[0])
+
+    def _classify_chunk(self, hands, out):
+        count = len(hands)
+        self._reserve(count)
+        fingers_up = self._fingers_up[:count]
+        thumb_gap = self._thumb_gap[:count]
+
+        # A finger is up when its tip is above its pip
+        np.less(hands[:, FINGER_TIP_ROWS, Y], hands[:, FINGER_PIP_ROWS, Y], out=fingers_up[:, 1:])
+        # The thumb moves sideways, only require a large enough vertical gap
+        np.subtract(hands[:, THUMB_TIP, Y], hands[:, THUMB_IP, Y], out=thumb_gap)
+        np.abs(thumb_gap, out=thumb_gap)
+        np.greater(thumb_gap, self.thumb_threshold, out=fingers_up[:, 0])
+
+        np.matmul(fingers_up.view(np.uint8), FINGER_BITS, out=out)
+
+
+class JointAngleClassifier:
+    """Classifies fingers from their joint bend angles, so tilted or sideways hands decode too
+
+    The angles between consecutive 3D bones do not change when the hand
+    rotates. A finger counts as up when its two outer joints (pip + dip, for
+    the thumb mcp + ip) bend less than the threshold in total. Works on N
+    hands at once like FingerStateClassifier, with reused scratch buffers.
+    """
+    def __init__(self, finger_bend_threshold=80.0, thumb_bend_threshold=50.0, capacity=2, aspect=1.0):
+        self.finger_bend_threshold = finger_bend_threshold
+        self.thumb_bend_threshold = thumb_bend_threshold
+        # Width / height of the frame the landmarks were found on. Normalized
+        # x is a fraction of the width and y of the height, x and z are scaled
+        # by it so the bones are in square units and the angles rotation-invariant
+        self.aspect = aspect
+        self._capacity = 0
+        self._reserve(capacity)
+
+    def set_frame_size(self, width, height):
+        self.aspect = width / height
+
+    def _reserve(self, count):
+        if count <= self._capacity:
+            return
+        self._capacity = count
+        self._bones = np.empty((count, 5, 4, 3), dtype=np.float32)
+        self._lengths = np.empty((count, 5, 4), dtype=np.float32)
+        self._angles = np.empty((count, 5, 3), dtype=np.float32)
+        self._bend = np.empty((count, 5), dtype=np.float32)
+        self._fingers_up = np.empty((count, 5), dtype=bool)
+
+    def classify(self, hands, out=None):
+        """Packed codes (uint8) for an (N, 21, 3) landmark array"""
+        count = len(hands)
+        if out is None:
+            out = np.empty(count, dtype=np.uint8)
+        for start in range(0, count, CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, count)
+            self._classify_chunk(hands[start:end], out[start:end])
+        return out
+
+    def classify_hand(self, hand):
+        """Packed code (int) of a single (21, 3) landmark array"""
+        return int(self.classify(hand[np.newaxis])[0])
+
+    def joint_angles(self, hands, out=None):
+        """Bend in degrees of the 3 joints (mcp, pip, dip; thumb: cmc, mcp, ip) of every finger, (N, 5, 3)"""
+        count = len(hands)
+        self._reserve(count)
+        angles = self._angles[:count] if out is None else out
+        bones = self._bones[:count]
+        lengths = self._lengths[:count]
+
+        # One gather per bone end, also casts float16 recordings to float32
+        np.subtract(hands[:, BONE_ENDS], hands[:, BONE_STARTS], out=bones)
+        if self.aspect != 1.0:
+            np.multiply(bones[..., 0::2], self.aspect, out=bones[..., 0::2])
+        np.einsum("nfbc,nfbc->nfb", bones, bones, out=lengths)
+        np.sqrt(lengths, out=lengths)
+        # Unit bones, a zero length (degenerate landmarks) stays a zero vector
+        np.maximum(lengths, 1e-6, out=lengths)
+        np.divide(bones, lengths[..., np.newaxis], out=bones)
+
+        # Cosine between each bone and the next one, then the bend angle
+        np.einsum("nfbc,nfbc->nfb", bones[:, :, :-1], bones[:, :, 1:], out=angles)
+        np.clip(angles, -1.0, 1.0, out=angles)
+        np.arccos(angles, out=angles)
+        np.degrees(angles, out=angles)
+        return angles
+
+    def _classify_chunk(self, hands, out):
+        count = len(hands)
+        angles = self.joint_angles(hands)
+        bend = self._bend[:count]
+        fingers_up = self._fingers_up[:count]
+
+        np.add(angles[:, :, 1], angles[:, :, 2], out=bend)
+        np.less(bend[:, 1:], self.finger_bend_threshold, out=fingers_up[:, 1:])
+        np.less(bend[:, 0], self.thumb_bend_threshold, out=fingers_up[:, 0])
+
+        np.matmul(fingers_up.view(np.uint8), FINGER_BITS, out=out)
+
+
+def code_to_gesture(code):
+    """Unpack a 5-bit code into the [thumb, index, middle, ring, pinky] 0/1 list"""
+    return [(code >> bit) & 1 for bit in range(5)]
+
+
+def pack_codes(codes):
+    """Pack per-slot 5-bit codes into one integer, the first slot in the high bits
+
+    Empty slots (None) are skipped, returns None when no hand is present.
+    """
+    packed = None
+    for code in codes:
+        if code is not None:
+            packed = code if packed is None else (packed << 5) | code
+    return packed
@@ -0,0 +1,91 @@
+# per-frame data shared by every stage of the camera pipeline
+import cv2
+import numpy as np
+
+
+class FrameContext:
+    """A captured frame with its single RGB conversion, timestamp and dimensions"""
+    def __init__(self, frame_bgr, frame_rgb, timestamp, sequence, inference_rgb=None, preview_rgb=None,
+                 captured_at=None):
+        self.frame_bgr = frame_bgr
+        self.frame_rgb = frame_rgb
+        # Copy already scaled to the preview widget, landmarks are drawn on it
+        self.preview_rgb = frame_rgb if preview_rgb is None else preview_rgb
+        # Downscaled copy the models run on, the full RGB frame when no
+        # inference resolution is configured. Mediapipe landmarks are
+        # normalized, so they map back onto frame_rgb by width and height
+        self.inference_rgb = frame_rgb if inference_rgb is None else inference_rgb
+        # Source clock time of the frame, and the monotonic time it was read
+        self.timestamp = timestamp
+        self.captured_at = timestamp if captured_at is None else captured_at
+        self.sequence = sequence
+        self.height, self.width = frame_bgr.shape[:2]
+
+
+class FrameContextPool:
+    """Builds FrameContexts, converting into preallocated RGB buffers reused round-robin"""
+    def __init__(self, size=4, inference_size=None, preview_size=None):
+        # Enough buffers that the GUI can still be painting an older frame
+        # while the worker fills the next one. The worker waits for the GUI
+        # to take each result (InferenceWorker.result_taken), so the shown
+        # buffer comes round again only after size - 1 newer frames were shown
+        self.size = max(2, size)
+        self._buffers = []
+        self._preview_buffers = []
+        self._shape = None
+        self._index = 0
+
+        # (width, height) box the preview is fitted into, keeping the aspect ratio
+        self.preview_size = preview_size
+
+        # (width, height) the models run at, None keeps the camera resolution
+        self.inference_size = None
+        self._inference_buffer = None
+        self.set_inference_size(inference_size)
+
+    def set_inference_size(self, inference_size):
+        """Set the (width, height) frames are downscaled to before inference"""
+        self.inference_size = tuple(inference_size) if inference_size else None
+        if self.inference_size is None:
+            self._inference_buffer = None
+        else:
+            width, height = self.inference_size
+            self._inference_buffer = np.empty((height, width, 3), dtype=np.uint8)
+
+    def acquire(self, frame_bgr, timestamp, sequence, captured_at=None):
+        """Convert a BGR frame to RGB once and wrap both in a FrameContext"""
+        if frame_bgr.shape != self._shape:
+            # Camera resolution changed (or first frame), reallocate the buffers
+            self._shape = frame_bgr.shape
+            self._buffers = [np.empty(frame_bgr.shape, dtype=np.uint8) for _ in range(self.size)]
+            self._preview_buffers = []
+            if self.preview_size is not None:
+                preview_width, preview_height = self._fit_preview(frame_bgr.shape[1], frame_bgr.shape[0])
+                self._preview_buffers = [np.empty((preview_height, preview_width, 3), dtype=np.uint8)
+                                         for _ in range(self.size)]
+            self._index = 0
+
+        frame_rgb = self._buffers[self._index]
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+
+        preview_rgb = None
+        if self._preview_buffers:
+            # Scale once to the widget size so the GUI paints it as is
+            preview_rgb = self._preview_buffers[self._index]
+            cv2.resize(frame_rgb, (preview_rgb.shape[1], preview_rgb.shape[0]), dst=preview_rgb,
+                       interpolation=cv2.INTER_AREA)
+        self._index = (self._index + 1) % self.size
+
+        inference_rgb = None
+        inference_buffer = self._inference_buffer
+        if inference_buffer is not None and inference_buffer.shape != frame_rgb.shape:
+            # Only the worker reads this buffer and it is done with it before
+            # the next frame, so a single one is enough
+            cv2.resize(frame_rgb, self.inference_size, dst=inference_buffer, interpolation=cv2.INTER_AREA)
+            inference_rgb = inference_buffer
+        return FrameContext(frame_bgr, frame_rgb, timestamp, sequence, inference_rgb, preview_rgb, captured_at)
+
+    def _fit_preview(self, width, height):
+        box_width, box_height = self.preview_size
+        scale = min(box_width / width, box_height / height)
+        return max(1, int(width * scale)), max(1, int(height * scale))
@@ -0,0 +1,119 @@
+# background capture of camera frames
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from src.core.capture.frame_pacer import FramePacer
+
+
+class LatestFrameSlot:
+    """Single-slot buffer that only ever keeps the newest captured frame"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._frame_available = threading.Condition(self._lock)
+        self._frame = None
+        self._timestamp = 0.0
+        self._captured_at = 0.0
+        self._sequence = 0
+        self._consumed_sequence = 0
+
+        # Counters exposed for diagnostics
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.consumed_frames = 0
+
+    def put(self, frame, timestamp, captured_at):
+        """Store a new frame, dropping the previous one if nobody consumed it
+
+        timestamp is the frame time on the source's clock, captured_at the
+        time.monotonic() when it was read, used for latency measurements.
+        """
+        with self._lock:
+            if self._sequence != self._consumed_sequence:
+                self.dropped_frames += 1
+            self._frame = frame
+            self._timestamp = timestamp
+            self._captured_at = captured_at
+            self._sequence += 1
+            self.captured_frames += 1
+            self._frame_available.notify_all()
+
+    def take(self):
+        """Return (frame, timestamp, sequence, captured_at) of the newest unconsumed frame or None without blocking"""
+        with self._lock:
+            return self._take_locked()
+
+    def wait_and_take(self, timeout=None):
+        """Block until a new frame arrives (or timeout in seconds) and return it like take()"""
+        with self._lock:
+            if self._sequence == self._consumed_sequence:
+                self._frame_available.wait(timeout)
+            return self._take_locked()
+
+    def wake(self):
+        """Release any thread blocked in wait_and_take"""
+        with self._lock:
+            self._frame_available.notify_all()
+
+    def _take_locked(self):
+        if self._sequence == self._consumed_sequence:
+            return None
+        self._consumed_sequence = self._sequence
+        self.consumed_frames += 1
+        return self._frame, self._timestamp, self._sequence, self._captured_at
+
+    def get_counters(self):
+        """Returns the captured, dropped and consumed frame counters"""
+        with self._lock:
+            return {
+                "captured": self.captured_frames,
+                "dropped": self.dropped_frames,
+                "consumed": self.consumed_frames
+            }
+
+
+class FrameGrabber(QThread):
+    frame_captured = pyqtSignal()
+    source_finished = pyqtSignal()
+
+    def __init__(self, frame_source, stage_timer=None, parent=None):
+        super().__init__(parent)
+        self.frame_source = frame_source
+        self.stage_timer = stage_timer
+        self.slot = LatestFrameSlot()
+        self.pacer = FramePacer()
+        self._running = False
+
+    def run(self):
+        self._running = True
+        while self._running:
+            start = time.perf_counter()
+            latest_frame = self.frame_source.read()
+            if self.stage_timer is not None:
+                self.stage_timer.record("read", start)
+            if latest_frame is None:
+                if self.frame_source.finished:
+                    # End of recorded footage
+                    self._running = False
+                    self.source_finished.emit()
+                    break
+                # Camera hiccup, wait about half a frame instead of spinning
+                self.msleep(max(1, int(self.pacer.frame_interval() * 500)))
+                continue
+            frame, timestamp = latest_frame
+            if self.frame_source.live \
+                    and self.pacer.is_duplicate(frame, getattr(self.frame_source, "driver_timestamp", None)):
+                # Repeated buffer, nothing new to process
+                continue
+            captured_at = time.monotonic()
+            self.pacer.record(captured_at)
+            # Processing follows the camera: the worker wakes on every new frame
+            self.slot.put(frame, timestamp, captured_at)
+            self.frame_captured.emit()
+
+    def stop(self):
+        """Stop the capture loop and wait for the thread to finish"""
+        self._running = False
+        self.slot.wake()
+        self.wait()
@@ -0,0 +1,73 @@
+# measures how fast the camera really delivers frames
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class FramePacer:
+    """Tracks camera delivery intervals, effective FPS, jitter and duplicate frames"""
+    def __init__(self, window=120, signature_step=32, max_consecutive_duplicates=2):
+        self._lock = threading.Lock()
+        self._intervals = deque(maxlen=window)
+        self._last_timestamp = None
+        # Without a driver timestamp, a sparse pixel grid is compared between
+        # frames. A still, dark scene can match too, so only the first few
+        # matches in a row are dropped: the stabilizer must keep getting frames
+        self.signature_step = signature_step
+        self.max_consecutive_duplicates = max_consecutive_duplicates
+        self._last_signature = None
+        self._last_driver_timestamp = None
+        self._consecutive_matches = 0
+        self.duplicate_frames = 0
+
+    def is_duplicate(self, frame, driver_timestamp=None):
+        """Returns True (and counts it) if the frame repeats the previous one
+
+        `driver_timestamp` is the capture time the camera driver gave the
+        buffer, None when unknown. A repeated driver timestamp is always a
+        duplicate, without one the pixel content decides.
+        """
+        if driver_timestamp is not None:
+            duplicate = driver_timestamp == self._last_driver_timestamp
+            self._last_driver_timestamp = driver_timestamp
+        else:
+            signature = frame[::self.signature_step, ::self.signature_step]
+            matches = self._last_signature is not None and np.array_equal(signature, self._last_signature)
+            # Copy, the camera backend may reuse the frame memory
+            self._last_signature = signature.copy()
+            self._consecutive_matches = self._consecutive_matches + 1 if matches else 0
+            duplicate = matches and self._consecutive_matches <= self.max_consecutive_duplicates
+        if duplicate:
+            with self._lock:
+                self.duplicate_frames += 1
+        return duplicate
+
+    def record(self, timestamp):
+        """Record the delivery time (seconds) of a new frame"""
+        with self._lock:
+            if self._last_timestamp is not None:
+                self._intervals.append(timestamp - self._last_timestamp)
+            self._last_timestamp = timestamp
+
+    def frame_interval(self, default=1 / 30):
+        """Mean measured delivery interval in seconds"""
+        with self._lock:
+            if not self._intervals:
+                return default
+            return sum(self._intervals) / len(self._intervals)
+
+    def get_stats(self):
+        """Returns the effective FPS, the interval jitter in ms and the duplicate count"""
+        with self._lock:
+            intervals = np.asarray(self._intervals)
+            duplicate_frames = self.duplicate_frames
+        if intervals.size == 0:
+            return {"fps": 0.0, "interval_ms": 0.0, "jitter_ms": 0.0, "duplicates": duplicate_frames}
+        mean_interval = float(intervals.mean())
+        return {
+            "fps": 1 / mean_interval if mean_interval > 0 else 0.0,
+            "interval_ms": mean_interval * 1000,
+            "jitter_ms": float(intervals.std()) * 1000,
+            "duplicates": duplicate_frames
+        }
@@ -0,0 +1,178 @@
+# where camera frames come from: a live device, footage or frames in memory
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FrameSource:
+    """Base class of the frame sources, read() returns (frame, timestamp) or None
+
+    Timestamps are seconds on the source's own clock: time.monotonic() for a
+    live device, media time for recorded footage. With realtime playback,
+    recorded frames are handed out at their original pace, otherwise as fast
+    as they can be read.
+    """
+    # Live devices may hand out the same buffer twice when read too quickly
+    live = False
+
+    def __init__(self, realtime=True, loop=False):
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self._playback_start = None
+        self._first_timestamp = None
+
+    def read(self):
+        raise NotImplementedError
+
+    def is_opened(self):
+        return True
+
+    def release(self):
+        pass
+
+    def _pace(self, timestamp):
+        """Sleep until the frame is due when playing back in real time"""
+        if not self.realtime:
+            return
+        now = time.monotonic()
+        if self._playback_start is None or timestamp < self._first_timestamp:
+            # First frame or looped back to the start
+            self._playback_start = now
+            self._first_timestamp = timestamp
+            return
+        delay = (timestamp - self._first_timestamp) - (now - self._playback_start)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DeviceFrameSource(FrameSource):
+    """A live camera through cv2.VideoCapture"""
+    live = True
+
+    def __init__(self, device_index=0):
+        super().__init__(realtime=False)
+        self.capture = cv2.VideoCapture(device_index)
+        # Driver timestamp (ms) of the last buffer read, None when the backend reports none
+        self.driver_timestamp = None
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret:
+            return None
+        position_ms = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+        self.driver_timestamp = position_ms if position_ms > 0 else None
+        return frame, time.monotonic()
+
+    def is_opened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileFrameSource(FrameSource):
+    """Recorded footage, timestamps come from the file's media time"""
+    def __init__(self, path, realtime=True, loop=False):
+        super().__init__(realtime, loop)
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self._index = 0
+        self._loop_offset = 0.0
+        self._last_timestamp = 0.0
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret and self.loop and self._index > 0:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._loop_offset = self._last_timestamp + 1 / self.fps
+            self._index = 0
+            ret, frame = self.capture.read()
+        if not ret:
+            self.finished = True
+            return None
+
+        position_ms = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+        # Some backends report no position, fall back to the frame index
+        media_time = position_ms / 1000 if position_ms > 0 or self._index == 0 else self._index / self.fps
+        self._index += 1
+        timestamp = self._loop_offset + media_time
+        self._last_timestamp = timestamp
+        self._pace(timestamp)
+        return frame, timestamp
+
+    def is_opened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageSequenceFrameSource(FrameSource):
+    """A directory of images played back in file name order at a fixed rate"""
+    def __init__(self, directory, fps=30.0, realtime=True, loop=False):
+        super().__init__(realtime, loop)
+        self.fps = fps
+        self.paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        self._index = 0
+
+    def read(self):
+        failed_reads = 0
+        while True:
+            # A whole pass without a readable image would loop forever
+            if (self._index >= len(self.paths) and not self.loop) or failed_reads >= len(self.paths):
+                self.finished = True
+                return None
+            frame_number = self._index
+            self._index += 1
+            frame = cv2.imread(self.paths[frame_number % len(self.paths)])
+            if frame is not None:
+                break
+            failed_reads += 1
+        timestamp = frame_number / self.fps
+        self._pace(timestamp)
+        return frame, timestamp
+
+    def is_opened(self):
+        return bool(self.paths)
+
+
+class SyntheticFrameSource(FrameSource):
+    """Frames kept in memory, e.g. generated for tests or preloaded footage"""
+    def __init__(self, frames, timestamps=None, fps=30.0, realtime=False, loop=False):
+        super().__init__(realtime, loop)
+        self.frames = list(frames)
+        self.timestamps = list(timestamps) if timestamps is not None else [i / fps for i in range(len(self.frames))]
+        self.fps = fps
+        self._index = 0
+
+    def read(self):
+        if self._index >= len(self.frames):
+            if not self.loop or not self.frames:
+                self.finished = True
+                return None
+        lap, position = divmod(self._index, len(self.frames))
+        self._index += 1
+        # Keep timestamps increasing across loops
+        lap_length = self.timestamps[-1] + 1 / self.fps
+        timestamp = lap * lap_length + self.timestamps[position]
+        self._pace(timestamp)
+        return self.frames[position], timestamp
+
+    def is_opened(self):
+        return bool(self.frames)
+
+
+def open_frame_source(spec, realtime=True, loop=False):
+    """Build a frame source from a device index, an image directory or a video file path"""
+    if isinstance(spec, int) or str(spec).isdigit():
+        return DeviceFrameSource(int(spec))
+    if os.path.isdir(spec):
+        return ImageSequenceFrameSource(spec, realtime=realtime, loop=loop)
+    return VideoFileFrameSource(spec, realtime=realtime, loop=loop)
@@ -0,0 +1,93 @@
+# one integer for a shown or expected finger code
+from src.core.gestures.methods.finger_classifier import code_to_gesture, pack_codes
+
+BITS_PER_HAND = 5
+HAND_MASK = (1 << BITS_PER_HAND) - 1
+MAX_HANDS = 2
+
+
+class CodeDisplay:
+    """Precomputed texts and counts of one code value"""
+    __slots__ = ("decimal", "binary", "label", "finger_count", "count_label")
+
+    def __init__(self, value, hands):
+        hand_codes = [(value >> (BITS_PER_HAND * shift)) & HAND_MASK for shift in reversed(range(hands))]
+        hand_binaries = [format(code, f"0{BITS_PER_HAND}b") for code in hand_codes]
+        hand_counts = [code.bit_count() for code in hand_codes]
+        self.decimal = value
+        self.binary = "".join(hand_binaries)
+        # What the camera label shows: bits per hand, or in reverse mode the
+        # finger count (summed over two hands)
+        self.label = " ".join(hand_binaries)
+        self.finger_count = sum(hand_counts)
+        self.count_label = str(self.finger_count) if hands == 2 else " ".join(str(count) for count in hand_counts)
+
+
+# DISPLAY_TABLES[hands][value], 32 one-hand and 1024 two-hand entries
+DISPLAY_TABLES = {hands: [CodeDisplay(value, hands) for value in range(1 << (BITS_PER_HAND * hands))]
+                  for hands in range(1, MAX_HANDS + 1)}
+
+
+class GestureCode:
+    """Finger code of one or more hands packed into an integer
+
+    Every hand takes 5 bits, thumb in the lowest bit and pinky in the highest,
+    so a hand reads pinky..thumb from left to right like the camera label. With
+    two hands the left hand of the preview owns the high 5 bits. Codes compare
+    and hash by value, also against plain ints.
+    """
+    __slots__ = ("value", "hands")
+
+    def __init__(self, value, hands=1):
+        self.value = int(value)
+        self.hands = hands
+
+    @classmethod
+    def from_hand_codes(cls, codes):
+        """Code of the visible hands from per-slot 5-bit codes (None for an empty slot), None when no hand shows"""
+        value = pack_codes(codes)
+        if value is None:
+            return None
+        return cls(value, sum(code is not None for code in codes))
+
+    def display(self):
+        """Precomputed CodeDisplay of this code"""
+        return DISPLAY_TABLES[self.hands][self.value]
+
+    def hand_codes(self):
+        """5-bit code of every hand, first (left) hand first"""
+        return [(self.value >> (BITS_PER_HAND * shift)) & HAND_MASK for shift in reversed(range(self.hands))]
+
+    def gestures(self):
+        """[thumb, index, middle, ring, pinky] 0/1 list of every hand"""
+        return [code_to_gesture(code) for code in self.hand_codes()]
+
+    def finger_count(self):
+        """Number of raised fingers over all hands"""
+        return self.display().finger_count
+
+    def binary(self):
+        """Pinky..thumb bits of every hand without separator, e.g. 0001110000 for two hands"""
+        return self.display().binary
+
+    def __int__(self):
+        return self.value
+
+    def __index__(self):
+        return self.value
+
+    def __eq__(self, other):
+        if isinstance(other, GestureCode):
+            return self.value == other.value
+        if isinstance(other, int):
+            return self.value == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __str__(self):
+        return self.binary()
+
+    def __repr__(self):
+        return f"GestureCode({self.value}, hands={self.hands})"
@@ -1,28 +1,45 @@
-import mediapipe as mp
-from src.core.gestures.landmarks_dictionary import get_hand_landmarks
-from src.core.gestures.methods.finger_count import FingerCount
+import numpy as np
+
+from src.core.gestures.landmarks_dictionary import get_hand_landmarks, HAND_LANDMARK_COUNT
+from src.core.gestures.methods.finger_classifier import JointAngleClassifier, code_to_gesture
 
 class GestureDecoder():
-    def __init__(self):
+    def __init__(self, max_hands=2, classifier=None):
         super().__init__()
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.mp_drawing = mp.solutions.drawing_utils
+        # Landmarks come from the detector owned by the camera pipeline. Joint
+        # angles by default, FingerStateClassifier is the older tip-above-pip check
+        self.classifier = classifier if classifier is not None else JointAngleClassifier(capacity=max_hands)
+
+        # Reused per frame: every detected hand stacked, and their codes
+        self._hand_arrays = np.empty((max_hands, HAND_LANDMARK_COUNT, 3), dtype=np.float32)
+        self._codes = np.empty(max_hands, dtype=np.uint8)
         
     def detect_gestures(self, landmarks):
-        landmarks_dictionary = get_hand_landmarks(landmarks, self.mp_hands)
-        if landmarks_dictionary is None:
+        """Decode a mediapipe hand landmark list"""
+        return self.detect_gestures_from_array(get_hand_landmarks(landmarks))
+
+    def detect_gestures_from_array(self, landmark_array):
+        """Decode a (21, 3) landmark array, e.g. converted once per frame or replayed from a recording"""
+        if landmark_array is None:
             return None
-        
-        count_list = FingerCount().test(landmarks_dictionary)
-        return self.evaluate(count_list)
+        return self.evaluate(code_to_gesture(self.classifier.classify_hand(landmark_array)))
+
+    def set_frame_size(self, width, height):
+        """Size in pixels of the frames the landmarks come from, the classifier corrects for its aspect ratio"""
+        self.classifier.set_frame_size(width, height)
+
+    def hands_to_array(self, multi_hand_landmarks):
+        """Stack a frame's mediapipe hands into a reused (N, 21, 3) array"""
+        count = min(len(multi_hand_landmarks), len(self._hand_arrays))
+        for index in range(count):
+            get_hand_landmarks(multi_hand_landmarks[index], out=self._hand_arrays[index])
+        return self._hand_arrays[:count]
+
+    def decode_codes(self, hand_arrays):
+        """Packed 5-bit codes of all hands in one classifier pass"""
+        return self.classifier.classify(hand_arrays, out=self._codes[:len(hand_arrays)])
 
     def evaluate(self, values):
         if not values:
             return None
-        return [1 if val else 0 for val in values]
\ No newline at end of file
+        return [1 if val else 0 for val in values]
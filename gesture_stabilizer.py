@@ -0,0 +1,77 @@
+# temporal smoothing of the per-hand gesture codes
+import numpy as np
+
+
+class GestureStabilizer:
+    """Majority vote of each hand's code over a short time window, with confidence and hold time
+
+    Every hand slot keeps a fixed-size ring buffer of (timestamp, code) and a
+    running histogram of the codes in it, so an update is O(1) per hand.
+    """
+    def __init__(self, max_hands=2, window_ms=250, capacity=16, code_count=32):
+        self.max_hands = max_hands
+        self.window = window_ms / 1000
+        self.capacity = capacity
+        # Codes are 0..code_count-1, code_count itself stands for "no hand"
+        self.no_hand = code_count
+
+        self._codes = np.full((max_hands, capacity), self.no_hand, dtype=np.int16)
+        self._timestamps = np.zeros((max_hands, capacity))
+        self._counts = np.zeros((max_hands, code_count + 1), dtype=np.int32)
+        self._heads = [0] * max_hands
+        self._sizes = [0] * max_hands
+        self._stable_since = [0.0] * max_hands
+
+        # Results of the last update, per hand slot
+        self.stable_codes = [None] * max_hands
+        self.confidence = [0.0] * max_hands
+        self.held_ms = [0.0] * max_hands
+
+    def reset(self):
+        self._counts[:] = 0
+        self._heads = [0] * self.max_hands
+        self._sizes = [0] * self.max_hands
+        self.stable_codes = [None] * self.max_hands
+        self.confidence = [0.0] * self.max_hands
+        self.held_ms = [0.0] * self.max_hands
+
+    def update(self, timestamp, codes):
+        """Add one frame's codes (per hand slot, None for no hand) and return the stable codes"""
+        for slot in range(self.max_hands):
+            code = codes[slot] if slot < len(codes) and codes[slot] is not None else self.no_hand
+            self._push(slot, timestamp, code)
+
+            counts = self._counts[slot]
+            majority = int(counts.argmax())
+            stable = None if majority == self.no_hand else majority
+            previous = self.stable_codes[slot]
+            previous_count = counts[self.no_hand if previous is None else previous]
+            if stable != previous and previous_count == counts[majority]:
+                # Tie with the current code, keep it rather than flicker
+                stable = previous
+                majority = self.no_hand if previous is None else previous
+
+            if stable != previous:
+                self._stable_since[slot] = timestamp
+                self.stable_codes[slot] = stable
+            self.confidence[slot] = counts[majority] / self._sizes[slot]
+            self.held_ms[slot] = (timestamp - self._stable_since[slot]) * 1000
+        return self.stable_codes
+
+    def _push(self, slot, timestamp, code):
+        codes = self._codes[slot]
+        timestamps = self._timestamps[slot]
+        counts = self._counts[slot]
+        head = self._heads[slot]
+        size = self._sizes[slot]
+
+        # Drop entries that fell out of the time window, or the oldest when full
+        while size and (size == self.capacity or timestamp - timestamps[(head - size) % self.capacity] > self.window):
+            counts[codes[(head - size) % self.capacity]] -= 1
+            size -= 1
+
+        codes[head] = code
+        timestamps[head] = timestamp
+        counts[code] += 1
+        self._heads[slot] = (head + 1) % self.capacity
+        self._sizes[slot] = size + 1
@@ -0,0 +1,129 @@
+# keeps every detected hand in the same code position from frame to frame
+import itertools
+
+from src.core.gestures.landmarks_dictionary import X, Y
+
+# Mediapipe labels handedness as if the image were mirrored. The camera feed
+# is not, so "Left" is the hand on the left of the preview: it owns the high
+# 5 bits of a two-hand code, the way the code reads on screen
+HANDEDNESS_SLOTS = {"Left": 0, "Right": 1}
+
+
+class HandTrack:
+    def __init__(self, track_id, slot, center, timestamp, left_score):
+        self.track_id = track_id
+        self.slot = slot
+        self.center = center
+        self.last_seen = timestamp
+        # Running estimate of how likely this is mediapipe's "Left" hand
+        self.left_score = left_score
+
+
+class HandTracker:
+    """Gives each hand a persistent track ID and a fixed slot, using position and handedness"""
+    def __init__(self, slots=2, max_distance=0.25, lost_after=0.5, smoothing=0.2):
+        self.slots = slots
+        # Largest wrist-to-center jump (normalized) still treated as the same hand
+        self.max_distance = max_distance
+        # Seconds a track survives without being detected
+        self.lost_after = lost_after
+        self.smoothing = smoothing
+        self.tracks = []
+        self._next_id = itertools.count(1)
+
+    def reset(self, slots=None):
+        if slots is not None:
+            self.slots = slots
+        self.tracks = []
+
+    def assign(self, timestamp, hand_arrays, multi_handedness=None):
+        """Returns, for every slot, the index of the hand in hand_arrays or None"""
+        self.tracks = [track for track in self.tracks if timestamp - track.last_seen <= self.lost_after]
+
+        detections = []
+        for index, hand in enumerate(hand_arrays):
+            center = (float(hand[:, X].mean()), float(hand[:, Y].mean()))
+            detections.append((index, center, self._left_probability(multi_handedness, index)))
+
+        # Greedy nearest matching, there are at most a couple of hands
+        pairs = sorted(
+            (self._distance(track.center, center), track_position, detection_position)
+            for track_position, track in enumerate(self.tracks)
+            for detection_position, (_, center, _) in enumerate(detections))
+        matched_tracks, matched_detections = {}, {}
+        for distance, track_position, detection_position in pairs:
+            if distance > self.max_distance:
+                break
+            if track_position in matched_tracks or detection_position in matched_detections:
+                continue
+            matched_tracks[track_position] = detection_position
+            matched_detections[detection_position] = track_position
+
+        for track_position, detection_position in matched_tracks.items():
+            track = self.tracks[track_position]
+            _, center, left_probability = detections[detection_position]
+            track.center = center
+            track.last_seen = timestamp
+            track.left_score += self.smoothing * (left_probability - track.left_score)
+
+        for detection_position, (_, center, left_probability) in enumerate(detections):
+            if detection_position in matched_detections:
+                continue
+            slot = self._free_slot(left_probability)
+            if slot is None:
+                continue
+            track = HandTrack(next(self._next_id), slot, center, timestamp, left_probability)
+            self.tracks.append(track)
+            matched_tracks[len(self.tracks) - 1] = detection_position
+
+        self._correct_swapped_slots()
+
+        assignment = [None] * self.slots
+        for track_position, detection_position in matched_tracks.items():
+            assignment[self.tracks[track_position].slot] = detections[detection_position][0]
+        return assignment
+
+    def nearest_first(self, centers):
+        """Indices of (x, y) hand centers, the one closest to a live track first
+
+        Without tracks the order is kept.
+        """
+        def distance(index):
+            return min((self._distance(track.center, centers[index]) for track in self.tracks),
+                       default=0.0)
+        return sorted(range(len(centers)), key=distance)
+
+    def track_ids(self):
+        """Track ID per slot, None for an empty slot"""
+        ids = [None] * self.slots
+        for track in self.tracks:
+            ids[track.slot] = track.track_id
+        return ids
+
+    def _free_slot(self, left_probability):
+        taken = {track.slot for track in self.tracks}
+        if self.slots == 1:
+            return None if taken else 0
+        preferred = HANDEDNESS_SLOTS["Left"] if left_probability >= 0.5 else HANDEDNESS_SLOTS["Right"]
+        if preferred not in taken:
+            return preferred
+        return next((slot for slot in range(self.slots) if slot not in taken), None)
+
+    def _correct_swapped_slots(self):
+        """Swap two tracks when their accumulated handedness clearly contradicts their slots"""
+        if self.slots != 2 or len(self.tracks) != 2:
+            return
+        first, second = sorted(self.tracks, key=lambda track: track.slot)
+        if first.left_score < 0.3 and second.left_score > 0.7:
+            first.slot, second.slot = second.slot, first.slot
+
+    @staticmethod
+    def _left_probability(multi_handedness, index):
+        if not multi_handedness or index >= len(multi_handedness):
+            return 0.5
+        classification = multi_handedness[index].classification[0]
+        return classification.score if classification.label == "Left" else 1 - classification.score
+
+    @staticmethod
+    def _distance(first, second):
+        return ((first[0] - second[0]) ** 2 + (first[1] - second[1]) ** 2) ** 0.5
@@ -0,0 +1,43 @@
+# hands-only validation: holding the same code long enough confirms it
+class HoldConfirmer:
+    """Confirms a stabilized code once it has been held for `hold_ms`, once per hold
+
+    The player has to change the code (or drop their hands) before the
+    same code can be confirmed again. The hold only counts from the first
+    update after a reset, so a code already held while validation was not
+    possible (e.g. behind the answer screen) still has to be held `hold_ms`.
+    """
+    def __init__(self, hold_ms=1500, min_confidence=0.8):
+        self.hold_ms = hold_ms
+        # Majority share the stable code needs, a flickering hold does not count
+        self.min_confidence = min_confidence
+        self._key = None
+        self._held_ms_before = 0.0
+        self._confirmed = False
+
+    def reset(self):
+        self._key = None
+        self._held_ms_before = 0.0
+        self._confirmed = False
+
+    def update(self, code, held_ms, confidence, required_hands=1):
+        """Feed the current GestureCode (None without hands), returns True on the frame it gets confirmed
+
+        Only a code of at least `required_hands` hands is confirmed, so a
+        two-hand answer is not confirmed while the second hand is still
+        being raised.
+        """
+        key = None if code is None else (code.value, code.hands)
+        if key != self._key:
+            # A new hold starts, the time it was held before this update does not count
+            self._key = key
+            self._held_ms_before = held_ms
+            self._confirmed = False
+        # The stabilizer restarted the same code's hold
+        self._held_ms_before = min(self._held_ms_before, held_ms)
+        if key is None or self._confirmed or code.hands < required_hands:
+            return False
+        if held_ms - self._held_ms_before >= self.hold_ms and confidence >= self.min_confidence:
+            self._confirmed = True
+            return True
+        return False
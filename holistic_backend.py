@@ -0,0 +1,64 @@
+# hands and face landmarks from one mediapipe Holistic pass
+from src.core.gestures.model_registry import model_registry
+
+
+class HolisticClassification:
+    def __init__(self, label, score):
+        self.label = label
+        self.score = score
+
+
+class HolisticHandedness:
+    """Stands in for a mediapipe Hands handedness entry"""
+    def __init__(self, label, score=1.0):
+        self.classification = [HolisticClassification(label, score)]
+
+
+class HolisticResults:
+    """One Holistic result shaped like the Hands and FaceMesh results the pipeline consumes"""
+    def __init__(self, results):
+        # Holistic names hands after the player's own left and right. Hands
+        # labels them as if the image were mirrored, so the player's right
+        # hand is Hands' "Left", on the left of the (unmirrored) preview
+        self.multi_hand_landmarks = []
+        self.multi_handedness = []
+        for landmarks, label in ((results.right_hand_landmarks, "Left"), (results.left_hand_landmarks, "Right")):
+            if landmarks is not None:
+                self.multi_hand_landmarks.append(landmarks)
+                self.multi_handedness.append(HolisticHandedness(label))
+        self.multi_face_landmarks = [results.face_landmarks] if results.face_landmarks is not None else None
+
+    def hand_centers(self):
+        """Normalized (x, y) center of every hand"""
+        centers = []
+        for landmarks in self.multi_hand_landmarks:
+            points = landmarks.landmark
+            centers.append((sum(point.x for point in points) / len(points),
+                            sum(point.y for point in points) / len(points)))
+        return centers
+
+    def keep_hands(self, indices):
+        """Drop every hand but the ones at `indices`, in their original order"""
+        indices = sorted(indices)
+        self.multi_hand_landmarks = [self.multi_hand_landmarks[index] for index in indices]
+        self.multi_handedness = [self.multi_handedness[index] for index in indices]
+
+
+class HolisticBackend:
+    """Finds both hands and the face in a single graph instead of running Hands and FaceMesh side by side"""
+    def __init__(self, refine_face_landmarks=True, model_complexity=1):
+        self.holistic = model_registry.holistic(
+            self,
+            static_image_mode=False,
+            model_complexity=model_complexity,
+            refine_face_landmarks=refine_face_landmarks,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def process(self, image):
+        """Run Holistic on an RGB image, returns HolisticResults"""
+        return HolisticResults(self.holistic.process(image))
+
+    def release(self):
+        model_registry.release(self.holistic)
@@ -117,34 +117,14 @@ class IncorrectAnswerOverlay(QWidget):
             self.highscore_label.raise_()
             QTimer.singleShot(10000, self.highscore_label.hide)
 
-        if true_code and current_code:
+        if true_code is not None and current_code is not None:
 
             if current_game_mode == "default" or current_game_mode == "double_trouble" or current_game_mode == "speedrun":
-                true_decimal = self.binary_array_to_decimal(true_code)
-                true_binary_number = self.binary_array_to_binary_number(true_code)
-                
-                self.true_code_label.setText(f"{true_decimal}<sub>(10)</sub>  →  {true_binary_number}<sub>(2)</sub>")
-                self.current_code_label.setText(f"{current_code}<sub>(2)</sub>  !=  {true_binary_number}<sub>(2)</sub>")
+                self.true_code_label.setText(f"{int(true_code)}<sub>(10)</sub>  →  {true_code.binary()}<sub>(2)</sub>")
+                self.current_code_label.setText(f"{current_code.binary()}<sub>(2)</sub>  !=  {true_code.binary()}<sub>(2)</sub>")
             
             elif current_game_mode == "reverse":
-                true_binary_number = self.decimal_to_binary(true_code)
-                
-                self.true_code_label.setText(f"{true_binary_number}<sub>(2)</sub>  →  {true_code}<sub>(10)</sub>")
-                self.current_code_label.setText(f"{true_binary_number}<sub>(2)</sub>  !=  {current_code}<sub>(10)</sub>")
+                self.true_code_label.setText(f"{true_code.binary()}<sub>(2)</sub>  →  {int(true_code)}<sub>(10)</sub>")
+                self.current_code_label.setText(f"{true_code.binary()}<sub>(2)</sub>  !=  {current_code.finger_count()}<sub>(10)</sub>")
         else:
             self.current_code_label.setText("Please show a valid code.")
-
-    def binary_array_to_decimal(self, binary_array):
-        """Convert a binary array of size 5 to a decimal number"""
-        decimal = int("".join(str(bit) for bit in binary_array), 2)
-        return decimal
-    
-    def binary_array_to_binary_number(self, binary_array):
-        """Convert a binary array of size 5 to a binary number"""
-        binary_number = "".join(str(bit) for bit in binary_array)
-        return binary_number
-    
-    def decimal_to_binary(self, decimal):
-        """Convert a decimal number to a binary array of size 5"""
-        binary = bin(decimal)[2:].zfill(5)
-        return binary
\ No newline at end of file
@@ -0,0 +1,370 @@
+# runs the mediapipe models away from the GUI thread
+import threading
+import time
+
+import mediapipe as mp
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from src.core.gestures.wink_detector import WinkDetector
+from src.core.gestures.gesture_decoder import GestureDecoder
+from src.core.capture.frame_context import FrameContextPool
+from src.core.gestures.detector_scheduler import DetectorScheduler
+from src.core.gestures.holistic_backend import HolisticBackend
+from src.core.gestures.landmark_recording import LandmarkRecorder
+from src.core.gestures.methods.finger_classifier import code_to_gesture
+from src.core.gestures.model_registry import model_registry
+from src.core.gestures.gesture_stabilizer import GestureStabilizer
+from src.core.gestures.hand_tracker import HandTracker
+from src.core.gestures.calibration_profile import CalibrationProfile
+from src.core.logic.stage_timer import StageTimer
+
+# How the hands and face are found: Hands and FaceMesh graphs side by side,
+# or hands and face from one Holistic pass
+BACKENDS = ("separate", "holistic")
+
+
+class InferenceResult:
+    """Everything the camera widget needs to render one processed frame"""
+    def __init__(self, frame, gestures, wink, stable_codes=None, confidence=None, held_ms=None, track_ids=None):
+        self.frame = frame
+        # WinkEvent confirmed on this frame or None.
+        # Raw per-frame gestures and the stabilized 5-bit code per hand slot,
+        # both in slot order: the hand on the left of the preview comes first
+        self.gestures = gestures
+        self.wink = wink
+        self.stable_codes = stable_codes or []
+        self.confidence = confidence or []
+        self.held_ms = held_ms or []
+        self.track_ids = track_ids or []
+
+
+class InferenceWorker(QThread):
+    results_ready = pyqtSignal(object)
+    # Path of a requested recording once its file is complete
+    recording_closed = pyqtSignal(str)
+
+    def __init__(self, frame_slot, number_of_hands=1, inference_size=None, preview_size=None,
+                 stage_timer=None, parent=None):
+        super().__init__(parent)
+        self.frame_slot = frame_slot
+        self.stage_timer = stage_timer if stage_timer is not None else StageTimer()
+        self.number_of_hands = number_of_hands
+        self.mp_hands = mp.solutions.hands
+        self.mp_drawing = mp.solutions.drawing_utils
+        self.frame_pool = FrameContextPool(inference_size=inference_size, preview_size=preview_size)
+
+        # Hands every frame, face mesh every second frame and only in wink modes
+        self.scheduler = DetectorScheduler()
+        self.scheduler.register("hands", enabled=True, interval=1)
+        self.scheduler.register("face_mesh", enabled=False, interval=2)
+
+        # Keeps each hand in the same slot, whatever order mediapipe reports them in
+        self.hand_tracker = HandTracker(slots=number_of_hands)
+        # Majority vote of each hand slot's code over the last few hundred ms
+        self.gesture_stabilizer = GestureStabilizer()
+
+        # Models are created on the worker thread in run()
+        self.hands = None
+        self.holistic = None
+        self.wink_detector = None
+        self.gesture_decoder = None
+        # Thresholds of the current player, applied to the decoder and wink detector
+        self.calibration_profile = CalibrationProfile()
+        # One of wink_detector.WINK_MODES
+        self.wink_mode = "full"
+        # One of BACKENDS, and the one whose models are loaded: Holistic
+        # only pays off while the face is tracked too, the separate Hands
+        # model is cheaper on its own
+        self.backend = "separate"
+        self.active_backend = None
+
+        # Settings requested from the GUI thread, applied between frames
+        self._settings_lock = threading.Lock()
+        self._pending_number_of_hands = None
+        self._pending_wink_reset = False
+        self._pending_inference_size = None
+        self._pending_recording = None
+        self._pending_calibration_profile = None
+        self._pending_wink_mode = None
+        self._pending_backend = None
+        self._running = False
+        # Cleared while a result waits in the GUI's signal queue, its preview
+        # buffer must not come round the frame pool again before it is shown
+        self._result_taken = threading.Event()
+        self._result_taken.set()
+
+        # Landmark recording, opened on the first frame once its size is known
+        self.recording_path = None
+        self.recorder = None
+
+    def result_taken(self):
+        """Called by the GUI once it has handled the last result, the next frame may then be processed"""
+        self._result_taken.set()
+
+    def set_number_of_hands(self, number_of_hands):
+        """Request a new number of hands, the detector is rebuilt before the next frame"""
+        with self._settings_lock:
+            self._pending_number_of_hands = number_of_hands
+
+    def reset_wink_detector(self):
+        """Request a fresh wink detector before the next frame"""
+        with self._settings_lock:
+            self._pending_wink_reset = True
+
+    def set_inference_size(self, inference_size):
+        """Request a new (width, height) inference resolution, None for the camera resolution"""
+        with self._settings_lock:
+            self._pending_inference_size = (inference_size,)
+
+    def start_recording(self, path):
+        """Request recording of every processed frame's landmarks to `path`"""
+        with self._settings_lock:
+            self._pending_recording = (path,)
+
+    def stop_recording(self):
+        with self._settings_lock:
+            self._pending_recording = (None,)
+
+    def set_wink_mode(self, mode):
+        """Request how FaceMesh looks for the eyes (a WINK_MODES key) from the next frame on"""
+        with self._settings_lock:
+            self._pending_wink_mode = mode
+
+    def set_backend(self, backend):
+        """Request the models (a BACKENDS entry) that find the hands and face from the next frame on
+
+        "holistic" is only used while face landmarking is enabled (wink
+        validation), in the other modes the worker runs the separate Hands model.
+        """
+        with self._settings_lock:
+            self._pending_backend = backend
+
+    def set_calibration_profile(self, profile):
+        """Request the player's CalibrationProfile thresholds from the next frame on"""
+        with self._settings_lock:
+            self._pending_calibration_profile = profile
+
+    def initialize_hands_detector(self):
+        """Initialize or reinitialize the MediaPipe Hands detector with current settings"""
+        if self.hands is not None:
+            model_registry.release(self.hands)
+            self.hands = None
+        self.hand_tracker.reset(slots=self.number_of_hands)
+        self.gesture_stabilizer.reset()
+        if self.active_backend == "holistic":
+            # Holistic finds at most one hand of each side, there is nothing to rebuild
+            return
+        self.hands = model_registry.hands(
+            self,
+            static_image_mode=False,
+            max_num_hands=self.number_of_hands,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    def _apply_pending_settings(self):
+        with self._settings_lock:
+            number_of_hands = self._pending_number_of_hands
+            wink_reset = self._pending_wink_reset
+            inference_size = self._pending_inference_size
+            recording = self._pending_recording
+            calibration_profile = self._pending_calibration_profile
+            wink_mode = self._pending_wink_mode
+            backend = self._pending_backend
+            self._pending_number_of_hands = None
+            self._pending_wink_reset = False
+            self._pending_inference_size = None
+            self._pending_recording = None
+            self._pending_calibration_profile = None
+            self._pending_wink_mode = None
+            self._pending_backend = None
+
+        if backend is not None:
+            self.backend = backend
+        if self._wanted_backend() != self.active_backend:
+            # Backend requested, or face landmarking switched on or off under holistic
+            self.release_models(close_recorder=False)
+            self.initialize_models()
+        if number_of_hands is not None:
+            self.number_of_hands = number_of_hands
+            self.initialize_hands_detector()
+        if wink_reset:
+            self.wink_detector.release()
+            self.wink_detector = WinkDetector(self._face_mesh_mode())
+            self.calibration_profile.apply_to_wink_detector(self.wink_detector)
+        if wink_mode is not None:
+            self.wink_mode = wink_mode
+            self.wink_detector.set_mode(self._face_mesh_mode())
+        if inference_size is not None:
+            # Wrapped in a tuple so that None (camera resolution) is a valid request
+            self.frame_pool.set_inference_size(inference_size[0])
+        if recording is not None:
+            self._close_recorder()
+            self.recording_path = recording[0]
+        if calibration_profile is not None:
+            self.calibration_profile = calibration_profile
+            calibration_profile.apply_to_classifier(self.gesture_decoder.classifier)
+            calibration_profile.apply_to_wink_detector(self.wink_detector)
+
+    def _wanted_backend(self):
+        if self.backend == "holistic" and self.scheduler.is_enabled("face_mesh"):
+            return "holistic"
+        return "separate"
+
+    def _face_mesh_mode(self):
+        # Holistic brings its own face landmarks, the wink detector runs no FaceMesh
+        return None if self.active_backend == "holistic" else self.wink_mode
+
+    def initialize_models(self):
+        """Create the mediapipe models, called on the thread that runs them"""
+        self.active_backend = self._wanted_backend()
+        if self.active_backend == "holistic":
+            self.holistic = HolisticBackend()
+        self.initialize_hands_detector()
+        self.wink_detector = WinkDetector(self._face_mesh_mode())
+        self.gesture_decoder = GestureDecoder()
+        self.calibration_profile.apply_to_classifier(self.gesture_decoder.classifier)
+        self.calibration_profile.apply_to_wink_detector(self.wink_detector)
+
+    def release_models(self, close_recorder=True):
+        if self.hands is not None:
+            model_registry.release(self.hands)
+            self.hands = None
+        if self.holistic is not None:
+            self.holistic.release()
+            self.holistic = None
+        self.wink_detector.release()
+        if close_recorder:
+            self._close_recorder()
+
+    def _close_recorder(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.frames_written} frames of landmarks to {self.recorder.path}")
+        path = self.recording_path
+        self.recorder = None
+        self.recording_path = None
+        if path is not None:
+            # Also sent when no frame arrived, the file then simply does not exist
+            self.recording_closed.emit(path)
+
+    def run(self):
+        self._running = True
+        self.initialize_models()
+
+        while self._running:
+            # A slow GUI makes the slot drop frames instead of the pool
+            # overwriting a buffer that is still to be painted
+            if not self._result_taken.wait(timeout=0.1):
+                continue
+            latest_frame = self.frame_slot.wait_and_take(timeout=0.1)
+            if latest_frame is None:
+                continue
+            self._apply_pending_settings()
+            start = time.perf_counter()
+            frame = self.frame_pool.acquire(*latest_frame)
+            self.stage_timer.record("convert", start)
+            result = self.process_frame(frame)
+            self._result_taken.clear()
+            self.results_ready.emit(result)
+
+        self.release_models()
+
+    def process_frame(self, frame):
+        """Run hands and wink detection on a FrameContext and draw the landmarks"""
+        # Let mediapipe read the shared RGB buffer by reference
+        frame.inference_rgb.flags.writeable = False
+        timer = self.stage_timer
+        results = None
+        wink = None
+        eye_points = None
+        face_ran = False
+        if self.active_backend == "holistic":
+            results, face_ran, wink, eye_points = self._process_holistic(frame)
+        elif self.scheduler.should_run("hands"):
+            start = time.perf_counter()
+            # Always the full frame: in video mode Hands already crops its landmark
+            # model around last frame's hands and only runs palm detection once
+            # tracking is lost, a moving crop of our own would break that tracking
+            results = self.hands.process(frame.inference_rgb)
+            timer.record("hands", start)
+        if self.active_backend != "holistic" and self.scheduler.should_run("face_mesh"):
+            face_ran = True
+            start = time.perf_counter()
+            wink = self.wink_detector.detect_wink(frame)
+            eye_points = self.wink_detector.last_eye_points
+            timer.record("wink", start)
+        frame.inference_rgb.flags.writeable = True
+
+        # Draw hand landmarks on the preview and detect gestures, the
+        # normalized landmarks scale to any resolution. All hands are
+        # stacked once into an array shared by decoding and recording
+        multi_hand_gestures = []
+        hand_arrays = []
+        codes = []
+        if results is not None and results.multi_hand_landmarks:
+            start = time.perf_counter()
+            for landmarks in results.multi_hand_landmarks:
+                self.mp_drawing.draw_landmarks(frame.preview_rgb, landmarks, self.mp_hands.HAND_CONNECTIONS)
+            timer.record("draw", start)
+
+            start = time.perf_counter()
+            self.gesture_decoder.set_frame_size(frame.width, frame.height)
+            hand_arrays = self.gesture_decoder.hands_to_array(results.multi_hand_landmarks)
+            hand_codes = self.gesture_decoder.decode_codes(hand_arrays).tolist()
+            # Put every hand's code in its tracked slot
+            slots = self.hand_tracker.assign(frame.timestamp, hand_arrays, results.multi_handedness)
+            codes = [None if index is None else hand_codes[index] for index in slots]
+            multi_hand_gestures = [code_to_gesture(code) for code in codes if code is not None]
+            timer.record("decode", start)
+        elif results is not None:
+            self.hand_tracker.assign(frame.timestamp, [])
+
+        if results is not None:
+            self.gesture_stabilizer.update(frame.timestamp, codes)
+
+        if self.recording_path is not None:
+            if self.recorder is None:
+                self.recorder = LandmarkRecorder(self.recording_path, frame.width, frame.height)
+            multi_handedness = results.multi_handedness if results is not None else None
+            self.recorder.record(frame.timestamp, hand_arrays, multi_handedness, eye_points,
+                                 hands_ran=results is not None, face_ran=face_ran)
+
+        stabilizer = self.gesture_stabilizer
+        slot_count = self.hand_tracker.slots
+        return InferenceResult(frame, multi_hand_gestures, wink, stabilizer.stable_codes[:slot_count],
+                               stabilizer.confidence[:slot_count], stabilizer.held_ms[:slot_count],
+                               self.hand_tracker.track_ids())
+
+    def _process_holistic(self, frame):
+        """Hands results, whether the face was looked at, wink and eye points of one Holistic pass
+
+        Holistic only runs on the frames hands or face are due.
+        """
+        run_hands = self.scheduler.should_run("hands")
+        # Face landmarks come free with a pass made for the hands
+        run_face = self.scheduler.should_run("face_mesh") or \
+            (run_hands and self.scheduler.is_enabled("face_mesh"))
+        if not run_hands and not run_face:
+            return None, False, None, None
+        start = time.perf_counter()
+        # The whole frame, Holistic tracks its own hand and face regions
+        results = self.holistic.process(frame.inference_rgb)
+        if len(results.multi_hand_landmarks) > self.number_of_hands:
+            # Holistic reports one hand of each side, keep the ones being tracked
+            order = self.hand_tracker.nearest_first(results.hand_centers())
+            results.keep_hands(order[:self.number_of_hands])
+        self.stage_timer.record("holistic", start)
+        if not run_face:
+            return results, False, None, None
+        start = time.perf_counter()
+        wink = self.wink_detector.update_from_face(results.multi_face_landmarks, frame)
+        self.stage_timer.record("wink", start)
+        return results if run_hands else None, True, wink, self.wink_detector.last_eye_points
+
+    def stop(self):
+        """Stop the inference loop and wait for the models to be released"""
+        self._running = False
+        self.frame_slot.wake()
+        self.wait()
@@ -0,0 +1,148 @@
+# compact recording of per-frame landmarks for offline replay
+#
+# A recording is a 64 byte header followed by one fixed-size FRAME_DTYPE
+# record per frame, so it can be appended to while playing and memory
+# mapped as a NumPy structured array when read back.
+import os
+import struct
+import numpy as np
+
+from src.core.gestures.wink_detector import EYE_LANDMARKS
+from src.core.gestures.methods.finger_classifier import code_to_gesture
+
+MAGIC = b"DTLM"
+VERSION = 2
+HEADER = struct.Struct("<4sHHII")  # magic, version, max hands, frame width, frame height
+HEADER_SIZE = 64
+
+MAX_HANDS = 2
+HAND_LANDMARK_COUNT = 21
+HANDEDNESS_CODES = {"Left": 0, "Right": 1}
+HANDEDNESS_LABELS = {code: label for label, code in HANDEDNESS_CODES.items()}
+UNKNOWN_HANDEDNESS = 255
+
+# float16 keeps normalized coordinates to ~0.0005 (under a pixel at 1280
+# wide for the tip / pip gaps and eye distances used), at ~340 bytes per frame.
+# hands_ran and face_ran tell the frames a detector skipped (see
+# DetectorScheduler) from frames where it ran and found nothing
+FRAME_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("hands_ran", "u1"),
+    ("face_ran", "u1"),
+    ("hand_count", "u1"),
+    ("face_found", "u1"),
+    ("handedness", "u1", (MAX_HANDS,)),
+    ("hands", "<f2", (MAX_HANDS, HAND_LANDMARK_COUNT, 3)),
+    ("eyes", "<f2", (len(EYE_LANDMARKS), 3)),
+])
+
+class LandmarkRecorder:
+    """Appends hand landmarks, handedness, eye landmarks and timestamps to a recording file"""
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, MAX_HANDS, width, height).ljust(HEADER_SIZE, b"\0"))
+        self._record = np.zeros(1, dtype=FRAME_DTYPE)
+        self.frames_written = 0
+
+    def record(self, timestamp, hand_arrays=None, multi_handedness=None, eye_points=None,
+               hands_ran=True, face_ran=True):
+        """Write one frame from (21, 3) hand landmark arrays, hands and eyes may be None when not detected
+
+        `hands_ran` and `face_ran` are False on frames the detector was not run on.
+        """
+        record = self._record
+        record["timestamp"] = timestamp
+        record["hands_ran"] = hands_ran
+        record["face_ran"] = face_ran
+        record["hands"] = 0
+        record["handedness"] = UNKNOWN_HANDEDNESS
+
+        hands = [] if hand_arrays is None else hand_arrays[:MAX_HANDS]
+        record["hand_count"] = len(hands)
+        for index, hand_array in enumerate(hands):
+            record["hands"][0, index] = hand_array
+            if multi_handedness and index < len(multi_handedness):
+                label = multi_handedness[index].classification[0].label
+                record["handedness"][0, index] = HANDEDNESS_CODES.get(label, UNKNOWN_HANDEDNESS)
+
+        record["face_found"] = eye_points is not None
+        record["eyes"] = 0 if eye_points is None else eye_points
+
+        self.file.write(self._record.tobytes())
+        self.frames_written += 1
+
+    def close(self):
+        self.file.close()
+
+
+class LandmarkRecording:
+    """Memory-mapped view of a recording written by LandmarkRecorder"""
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{path} is not a landmark recording")
+        magic, version, max_hands, self.width, self.height = HEADER.unpack_from(header)
+        if magic != MAGIC or version != VERSION or max_hands != MAX_HANDS:
+            raise ValueError(f"{path} is not a version {VERSION} landmark recording")
+
+        # A recording cut short (e.g. a crash) may end with a partial record
+        count = (os.path.getsize(path) - HEADER_SIZE) // FRAME_DTYPE.itemsize
+        if count:
+            self.frames = np.memmap(path, dtype=FRAME_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.frames = np.zeros(0, dtype=FRAME_DTYPE)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def timestamps(self):
+        return self.frames["timestamp"]
+
+    def decode_codes(self, classifier):
+        """Packed finger codes of every recorded hand in one batched pass
+
+        Returns a (frames, MAX_HANDS) int16 array, -1 where no hand was recorded.
+        """
+        classifier.set_frame_size(self.width, self.height)
+        # One strided view per hand slot, the memory map is never copied whole
+        codes = np.empty((len(self.frames), MAX_HANDS), dtype=np.uint8)
+        for slot in range(MAX_HANDS):
+            classifier.classify(self.frames["hands"][:, slot], out=codes[:, slot])
+        codes = codes.astype(np.int16)
+        codes[np.arange(MAX_HANDS) >= self.frames["hand_count"][:, np.newaxis]] = -1
+        return codes
+
+    def replay(self, gesture_decoder=None, wink_detector=None):
+        """Stream the recording back through the decoders, yields (timestamp, gestures, wink event or None) per frame
+
+        Gestures are None on frames the hands were not looked for, and the
+        wink detector only sees frames the face was looked for, as it did live.
+        Every hand is decoded up front in one batched pass, the per-frame
+        loop only looks gestures up and runs the wink logic.
+        """
+        width, height = self.width, self.height
+        frames = self.frames
+        # Plain lists, indexing them is much cheaper than reading numpy records
+        timestamps = frames["timestamp"].tolist()
+        hands_ran = frames["hands_ran"].astype(bool).tolist()
+        face_ran = frames["face_ran"].astype(bool).tolist()
+        face_found = frames["face_found"].astype(bool).tolist()
+        codes = None
+        if gesture_decoder is not None:
+            codes = self.decode_codes(gesture_decoder.classifier).tolist()
+            gesture_table = [gesture_decoder.evaluate(code_to_gesture(code)) for code in range(32)]
+        for index, timestamp in enumerate(timestamps):
+            gestures = None
+            if hands_ran[index]:
+                gestures = [] if codes is None else [gesture_table[code] for code in codes[index] if code >= 0]
+            wink = None
+            if wink_detector is not None and face_ran[index]:
+                eye_points = frames["eyes"][index].astype(np.float32) if face_found[index] else None
+                wink = wink_detector.update_from_eyes(eye_points, width, height, timestamp)
+            yield timestamp, gestures, wink
@@ -1,25 +1,40 @@
+import numpy as np
 
-def get_hand_landmarks(hand_landmarks, mp_hands):
-    return {
-        "wrist": hand_landmarks.landmark[mp_hands.HandLandmark.WRIST],
-        "thumb_cmc": hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_CMC],
-        "thumb_mcp": hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_MCP],
-        "thumb_ip": hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_IP],
-        "thumb_tip": hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP],
-        "index_mcp": hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_MCP],
-        "index_pip": hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP],
-        "index_dip": hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_DIP],
-        "index_tip": hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-        "middle_mcp": hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_MCP],
-        "middle_pip": hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP],
-        "middle_dip": hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_DIP],
-        "middle_tip": hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP],
-        "ring_mcp": hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_MCP],
-        "ring_pip": hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_PIP],
-        "ring_dip": hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_DIP],
-        "ring_tip": hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP],
-        "pinky_mcp": hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_MCP],
-        "pinky_pip": hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP],
-        "pinky_dip": hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_DIP],
-        "pinky_tip": hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]
-    }
\ No newline at end of file
+# Row indices of the (21, 3) landmark array, same order as mediapipe's HandLandmark
+WRIST = 0
+THUMB_CMC = 1
+THUMB_MCP = 2
+THUMB_IP = 3
+THUMB_TIP = 4
+INDEX_MCP = 5
+INDEX_PIP = 6
+INDEX_DIP = 7
+INDEX_TIP = 8
+MIDDLE_MCP = 9
+MIDDLE_PIP = 10
+MIDDLE_DIP = 11
+MIDDLE_TIP = 12
+RING_MCP = 13
+RING_PIP = 14
+RING_DIP = 15
+RING_TIP = 16
+PINKY_MCP = 17
+PINKY_PIP = 18
+PINKY_DIP = 19
+PINKY_TIP = 20
+HAND_LANDMARK_COUNT = 21
+
+# Column indices
+X, Y, Z = 0, 1, 2
+
+# Finger order used by every decoder: thumb, index, middle, ring, pinky
+FINGER_TIPS = np.array([THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP])
+FINGER_PIPS = np.array([THUMB_IP, INDEX_PIP, MIDDLE_PIP, RING_PIP, PINKY_PIP])
+
+
+def get_hand_landmarks(hand_landmarks, out=None):
+    """Convert a mediapipe landmark list once into a (21, 3) float32 array of x, y, z"""
+    if out is None:
+        out = np.empty((HAND_LANDMARK_COUNT, 3), dtype=np.float32)
+    out[:] = [(landmark.x, landmark.y, landmark.z) for landmark in hand_landmarks.landmark]
+    return out
@@ -0,0 +1,98 @@
+# shared, lazily created mediapipe models
+import os
+import threading
+import time
+
+import mediapipe as mp
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MODEL_FACTORIES = {
+    "hands": lambda **config: mp.solutions.hands.Hands(**config),
+    "face_mesh": lambda **config: mp.solutions.face_mesh.FaceMesh(**config),
+    "holistic": lambda **config: mp.solutions.holistic.Holistic(**config),
+}
+
+
+def _resident_memory():
+    """Resident memory of this process in bytes, None when it cannot be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """Creates mediapipe graphs lazily, one per owner and configuration
+
+    Graphs run in video mode and keep tracking state, so two owners (e.g. the
+    inference workers of two camera widgets) never get the same instance. An
+    owner asking twice for the same configuration shares one graph, which is
+    closed when its last use is released.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+
+    def hands(self, owner, **config):
+        return self.acquire("hands", owner, **config)
+
+    def face_mesh(self, owner, **config):
+        return self.acquire("face_mesh", owner, **config)
+
+    def holistic(self, owner, **config):
+        return self.acquire("holistic", owner, **config)
+
+    def acquire(self, kind, owner, **config):
+        """The `kind` graph of `owner` (any hashable object, usually the caller itself) for `config`"""
+        key = (kind, owner, tuple(sorted(config.items())))
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                memory_before = _resident_memory()
+                start = time.perf_counter()
+                model = MODEL_FACTORIES[kind](**config)
+                load_ms = (time.perf_counter() - start) * 1000
+                memory_after = _resident_memory()
+                memory_bytes = None
+                if memory_before is not None and memory_after is not None:
+                    memory_bytes = max(0, memory_after - memory_before)
+                entry = {"kind": kind, "owner": type(owner).__name__, "config": config, "model": model, "users": 0,
+                         "load_ms": load_ms, "memory_bytes": memory_bytes}
+                self._models[key] = entry
+                memory_text = f"{memory_bytes / 2**20:.1f} MB" if memory_bytes is not None else "unknown memory"
+                print(f"Loaded {kind} model in {load_ms:.0f} ms ({memory_text})")
+            entry["users"] += 1
+            return entry["model"]
+
+    def release(self, model):
+        """Drop one user of a model, closing it once nobody uses it"""
+        with self._lock:
+            for key, entry in self._models.items():
+                if entry["model"] is model:
+                    entry["users"] -= 1
+                    if entry["users"] <= 0:
+                        del self._models[key]
+                        model.close()
+                    return
+
+    def report(self):
+        """Load time and resident memory of every loaded model"""
+        with self._lock:
+            return [{
+                "kind": entry["kind"],
+                "owner": entry["owner"],
+                "config": dict(entry["config"]),
+                "users": entry["users"],
+                "load_ms": entry["load_ms"],
+                "memory_mb": entry["memory_bytes"] / 2**20 if entry["memory_bytes"] is not None else None
+            } for entry in self._models.values()]
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,381 @@
+# offline benchmarks of the gesture pipeline on recorded footage
+#
+# usage: python -m src.tools.pipeline_benchmark resolution path/to/footage.mp4
+#        python -m src.tools.pipeline_benchmark pipeline path/to/footage_or_image_dir
+#        python -m src.tools.pipeline_benchmark ear path/to/recording.dtlm
+#        python -m src.tools.pipeline_benchmark wink path/to/footage.mp4 --labels winks.txt
+#        python -m src.tools.pipeline_benchmark backend path/to/footage.mp4 --hands 2
+import argparse
+import time
+
+import numpy as np
+
+from src.core.capture.frame_context import FrameContextPool
+from src.core.capture.frame_source import open_frame_source
+from src.core.gestures.gesture_decoder import GestureDecoder
+from src.core.gestures.inference_worker import InferenceWorker, BACKENDS
+from src.core.gestures.model_registry import model_registry
+from src.core.gestures.landmark_recording import LandmarkRecording
+from src.core.gestures.wink_detector import WinkDetector, WINK_MODES, eye_aspect_ratios
+
+BENCHMARK_RESOLUTIONS = [(1280, 720), (640, 480), (320, 240)]
+
+# The wink modes plus the eye region crop on a video-mode FaceMesh, which
+# loses the face whenever the crop moves, to show what that costs in recall
+BENCHMARK_WINK_MODES = dict(
+    WINK_MODES, eye_region_video_graph=dict(WINK_MODES["eye_region"], static_image_mode=False))
+
+
+def load_frames(footage_path, max_frames=None, with_timestamps=False):
+    """Read recorded footage (video file or image directory) into a list of BGR frames
+
+    With `with_timestamps` the list holds (frame, media time) pairs instead.
+    """
+    source = open_frame_source(footage_path, realtime=False)
+    if not source.is_opened():
+        raise IOError(f"Failed to open footage: {footage_path}")
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        latest_frame = source.read()
+        if latest_frame is None:
+            break
+        frames.append(latest_frame if with_timestamps else latest_frame[0])
+    source.release()
+    return frames
+
+
+def summarize_latencies(latencies):
+    """Mean, p50 and p95 of a list of per-frame latencies in milliseconds"""
+    latencies = np.asarray(latencies)
+    return {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95))
+    }
+
+
+def decode_frames(frames, inference_size=None, number_of_hands=2):
+    """Run hands detection and gesture decoding on every frame at one inference resolution"""
+    pool = FrameContextPool(inference_size=inference_size)
+    # A graph of this pass's own, released at its end so every pass starts with fresh tracking
+    hands = model_registry.hands(
+        pool,
+        static_image_mode=False,
+        max_num_hands=number_of_hands,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+    decoder = GestureDecoder()
+
+    codes = []
+    latencies = []
+    for sequence, frame_bgr in enumerate(frames):
+        start = time.perf_counter()
+        frame = pool.acquire(frame_bgr, 0.0, sequence)
+        results = hands.process(frame.inference_rgb)
+        gestures = []
+        decoder.set_frame_size(frame.width, frame.height)
+        if results.multi_hand_landmarks:
+            for landmarks in results.multi_hand_landmarks:
+                gesture = decoder.detect_gestures(landmarks)
+                if gesture:
+                    gestures.append(tuple(gesture))
+        latencies.append((time.perf_counter() - start) * 1000)
+        codes.append(tuple(gestures))
+
+    model_registry.release(hands)
+    return codes, latencies
+
+
+def benchmark_resolutions(video_path, resolutions=BENCHMARK_RESOLUTIONS, max_frames=None):
+    """Compare decode accuracy and latency per inference resolution
+
+    Accuracy is the share of frames whose decoded code matches the decode at
+    the footage's native resolution.
+    """
+    frames = load_frames(video_path, max_frames)
+    if not frames:
+        raise ValueError(f"No frames found in {video_path}")
+
+    reference_codes, reference_latencies = decode_frames(frames)
+    height, width = frames[0].shape[:2]
+    report = [dict(resolution=f"{width}x{height} (native)", accuracy=1.0,
+                   **summarize_latencies(reference_latencies))]
+
+    for inference_size in resolutions:
+        codes, latencies = decode_frames(frames, inference_size)
+        matches = sum(code == reference for code, reference in zip(codes, reference_codes))
+        report.append(dict(resolution=f"{inference_size[0]}x{inference_size[1]}",
+                           accuracy=matches / len(frames),
+                           **summarize_latencies(latencies)))
+    return report
+
+
+def benchmark_pipeline(footage_path, number_of_hands=1, validation_method="click",
+                       inference_size=None, realtime=False, max_frames=None):
+    """Run the camera widget's full inference path over footage and report throughput and stage latencies"""
+    source = open_frame_source(footage_path, realtime=realtime)
+    if not source.is_opened():
+        raise IOError(f"Failed to open footage: {footage_path}")
+
+    worker = InferenceWorker(None, number_of_hands, inference_size, preview_size=(500, 400))
+    worker.scheduler.configure_for_validation(validation_method)
+    worker.initialize_models()
+
+    processed = 0
+    start = time.perf_counter()
+    while max_frames is None or processed < max_frames:
+        latest_frame = source.read()
+        if latest_frame is None:
+            break
+        frame_bgr, timestamp = latest_frame
+        convert_start = time.perf_counter()
+        frame = worker.frame_pool.acquire(frame_bgr, timestamp, processed)
+        worker.stage_timer.record("convert", convert_start)
+        worker.process_frame(frame)
+        processed += 1
+    elapsed = time.perf_counter() - start
+
+    worker.release_models()
+    source.release()
+
+    report = [{"stage": "total", "frames": processed, "fps": processed / elapsed if elapsed > 0 else 0.0}]
+    for stage, stats in worker.stage_timer.percentiles().items():
+        report.append(dict(stage=stage, **stats))
+    return report
+
+
+def baseline_ears(eye_points, width, height):
+    """Left and right EAR the way WinkDetector computed them before calculate_ears, one distance at a time"""
+    def eye_ratio(points):
+        coords = [(int(point[0] * width), int(point[1] * height)) for point in points]
+        a = np.linalg.norm(np.array(coords[1]) - np.array(coords[5]))
+        b = np.linalg.norm(np.array(coords[2]) - np.array(coords[4]))
+        c = np.linalg.norm(np.array(coords[0]) - np.array(coords[3]))
+        return (a + b) / (2.0 * c)
+    return eye_ratio(eye_points[:6]), eye_ratio(eye_points[6:])
+
+
+def benchmark_ear(recording_path, repeat=10):
+    """Time the eye aspect ratio on the face landmarks of a recording, without FaceMesh
+
+    Reports the per-frame cost of the old per-distance EAR (baseline_ears),
+    of WinkDetector.calculate_ears, of the whole wink logic per frame, and
+    of eye_aspect_ratios over every frame at once, each with its speedup
+    over the baseline.
+    """
+    recording = LandmarkRecording(recording_path)
+    frames = recording.frames
+    # Frames FaceMesh skipped are left out, as they were live
+    frames = frames[frames["face_ran"].astype(bool)]
+    face_found = frames["face_found"].astype(bool)
+    eyes = frames["eyes"][face_found].astype(np.float32)
+    if not len(eyes):
+        raise ValueError(f"No face landmarks found in {recording_path}")
+    width, height = recording.width, recording.height
+
+    # Fed recorded landmarks only, no FaceMesh is loaded
+    wink_detector = WinkDetector(None)
+    baseline_latencies = []
+    ear_latencies = []
+    for _ in range(repeat):
+        for eye_points in eyes:
+            start = time.perf_counter()
+            baseline_ears(eye_points, width, height)
+            baseline_latencies.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            wink_detector.calculate_ears(eye_points, width, height)
+            ear_latencies.append((time.perf_counter() - start) * 1000)
+
+    wink_latencies = []
+    for _ in range(repeat):
+        for record in frames:
+            eye_points = record["eyes"].astype(np.float32) if record["face_found"] else None
+            start = time.perf_counter()
+            wink_detector.update_from_eyes(eye_points, width, height, float(record["timestamp"]))
+            wink_latencies.append((time.perf_counter() - start) * 1000)
+    wink_detector.release()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        eye_aspect_ratios(eyes, width, height)
+    batch_ms = (time.perf_counter() - start) * 1000 / (repeat * len(eyes))
+
+    baseline = summarize_latencies(baseline_latencies)
+    ear = summarize_latencies(ear_latencies)
+
+    def speedup(mean_ms):
+        return baseline["mean_ms"] / mean_ms if mean_ms > 0 else float("inf")
+
+    return [
+        dict(path="baseline (per-distance norm)", frames=len(eyes), speedup=1.0, **baseline),
+        dict(path="calculate_ears", frames=len(eyes), speedup=speedup(ear["mean_ms"]), **ear),
+        dict(path="update_from_eyes", frames=len(frames), **summarize_latencies(wink_latencies)),
+        dict(path="eye_aspect_ratios (batched)", frames=len(eyes), speedup=speedup(batch_ms), mean_ms=batch_ms),
+    ]
+
+
+def match_events(detected, expected, tolerance):
+    """Precision and recall of detected event times against expected ones, each matched at most once"""
+    unmatched = sorted(expected)
+    true_positives = 0
+    for event in sorted(detected):
+        match = next((candidate for candidate in unmatched if abs(candidate - event) <= tolerance), None)
+        if match is not None:
+            unmatched.remove(match)
+            true_positives += 1
+    precision = true_positives / len(detected) if detected else 1.0
+    recall = true_positives / len(expected) if expected else 1.0
+    return precision, recall
+
+
+def detect_winks(frames, mode):
+    """Run one BENCHMARK_WINK_MODES mode over (frame, timestamp) pairs, returns wink times and per-frame CPU and wall time"""
+    pool = FrameContextPool()
+    wink_detector = WinkDetector(mode, BENCHMARK_WINK_MODES)
+    winks, cpu_latencies, wall_latencies = [], [], []
+    for sequence, (frame_bgr, timestamp) in enumerate(frames):
+        frame = pool.acquire(frame_bgr, timestamp, sequence)
+        # Process time includes mediapipe's own calculator threads
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        if wink_detector.detect_wink(frame):
+            winks.append(timestamp)
+        cpu_latencies.append((time.process_time() - cpu_start) * 1000)
+        wall_latencies.append((time.perf_counter() - wall_start) * 1000)
+    wink_detector.release()
+    return winks, cpu_latencies, wall_latencies
+
+
+def benchmark_wink_modes(footage_path, labels_path=None, tolerance=0.3, max_frames=None):
+    """Compare CPU per frame and wink precision/recall of every BENCHMARK_WINK_MODES mode on footage
+
+    Expected winks are the times (seconds of media time, one per line) in
+    `labels_path`, or without labels the winks the "full" mode finds.
+    """
+    frames = load_frames(footage_path, max_frames, with_timestamps=True)
+    if not frames:
+        raise ValueError(f"No frames found in {footage_path}")
+
+    detections = {mode: detect_winks(frames, mode) for mode in BENCHMARK_WINK_MODES}
+    if labels_path is not None:
+        with open(labels_path) as labels:
+            expected = [float(line) for line in labels if line.strip()]
+    else:
+        expected = detections["full"][0]
+
+    report = []
+    for mode, (winks, cpu_latencies, wall_latencies) in detections.items():
+        precision, recall = match_events(winks, expected, tolerance)
+        cpu = summarize_latencies(cpu_latencies)
+        report.append(dict(mode=mode, winks=len(winks), expected=len(expected),
+                           precision=precision, recall=recall,
+                           cpu_mean_ms=cpu["mean_ms"], cpu_p95_ms=cpu["p95_ms"],
+                           **summarize_latencies(wall_latencies)))
+    return report
+
+
+def run_backend(frames, backend, number_of_hands):
+    """Run the worker's frame path with one backend over (frame, timestamp) pairs
+
+    Returns the per-frame stable codes, the wink count and per-frame CPU and wall time.
+    """
+    worker = InferenceWorker(None, number_of_hands)
+    worker.backend = backend
+    # Winks looked for on every frame, as in the wink validation modes at their most expensive
+    worker.scheduler.configure_for_validation("wink")
+    worker.scheduler.set_interval("face_mesh", 1)
+    worker.initialize_models()
+
+    codes, cpu_latencies, wall_latencies = [], [], []
+    winks = 0
+    for sequence, (frame_bgr, timestamp) in enumerate(frames):
+        # Process time includes mediapipe's own calculator threads
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        frame = worker.frame_pool.acquire(frame_bgr, timestamp, sequence)
+        result = worker.process_frame(frame)
+        cpu_latencies.append((time.process_time() - cpu_start) * 1000)
+        wall_latencies.append((time.perf_counter() - wall_start) * 1000)
+        codes.append(tuple(result.stable_codes))
+        if result.wink is not None:
+            winks += 1
+
+    worker.release_models()
+    return codes, winks, cpu_latencies, wall_latencies
+
+
+def benchmark_backends(footage_path, number_of_hands=2, max_frames=None):
+    """Compare CPU per frame of separate Hands and FaceMesh against one Holistic pass on footage
+
+    Agreement is the share of frames whose stable codes match the "separate" backend's.
+    """
+    frames = load_frames(footage_path, max_frames, with_timestamps=True)
+    if not frames:
+        raise ValueError(f"No frames found in {footage_path}")
+
+    runs = {backend: run_backend(frames, backend, number_of_hands) for backend in BACKENDS}
+    reference_codes = runs["separate"][0]
+
+    report = []
+    for backend, (codes, winks, cpu_latencies, wall_latencies) in runs.items():
+        matches = sum(code == reference for code, reference in zip(codes, reference_codes))
+        wall = summarize_latencies(wall_latencies)
+        cpu = summarize_latencies(cpu_latencies)
+        report.append(dict(backend=backend, frames=len(frames), agreement=matches / len(frames), winks=winks,
+                           fps=1000 / wall["mean_ms"] if wall["mean_ms"] > 0 else 0.0,
+                           cpu_mean_ms=cpu["mean_ms"], cpu_p95_ms=cpu["p95_ms"], **wall))
+    return report
+
+
+def print_report(report):
+    for row in report:
+        print("  ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                        for key, value in row.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the gesture pipeline")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    resolution_parser = subparsers.add_parser("resolution", help="accuracy and latency per inference resolution")
+    resolution_parser.add_argument("footage")
+    resolution_parser.add_argument("--max-frames", type=int, default=None)
+
+    pipeline_parser = subparsers.add_parser("pipeline", help="throughput and stage latencies of the full pipeline")
+    pipeline_parser.add_argument("footage")
+    pipeline_parser.add_argument("--hands", type=int, default=1)
+    pipeline_parser.add_argument("--validation", choices=["click", "wink"], default="click")
+    pipeline_parser.add_argument("--inference-size", type=int, nargs=2, default=None, metavar=("WIDTH", "HEIGHT"))
+    pipeline_parser.add_argument("--realtime", action="store_true", help="play footage at its recorded pace")
+    pipeline_parser.add_argument("--max-frames", type=int, default=None)
+
+    ear_parser = subparsers.add_parser("ear", help="eye aspect ratio cost on recorded face landmarks")
+    ear_parser.add_argument("recording")
+    ear_parser.add_argument("--repeat", type=int, default=10)
+
+    wink_parser = subparsers.add_parser("wink", help="CPU per frame and wink precision/recall per wink mode")
+    wink_parser.add_argument("footage")
+    wink_parser.add_argument("--labels", default=None, help="file of expected wink times in seconds, one per line")
+    wink_parser.add_argument("--tolerance", type=float, default=0.3, help="seconds a wink may be off its label")
+    wink_parser.add_argument("--max-frames", type=int, default=None)
+
+    backend_parser = subparsers.add_parser("backend", help="CPU per frame of Hands + FaceMesh against Holistic")
+    backend_parser.add_argument("footage")
+    backend_parser.add_argument("--hands", type=int, default=2)
+    backend_parser.add_argument("--max-frames", type=int, default=None)
+
+    args = parser.parse_args()
+    if args.benchmark == "resolution":
+        print_report(benchmark_resolutions(args.footage, max_frames=args.max_frames))
+    elif args.benchmark == "pipeline":
+        print_report(benchmark_pipeline(args.footage, args.hands, args.validation, args.inference_size,
+                                        args.realtime, args.max_frames))
+    elif args.benchmark == "ear":
+        print_report(benchmark_ear(args.recording, args.repeat))
+    elif args.benchmark == "wink":
+        print_report(benchmark_wink_modes(args.footage, args.labels, args.tolerance, args.max_frames))
+    elif args.benchmark == "backend":
+        print_report(benchmark_backends(args.footage, args.hands, args.max_frames))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# short calibration phase that fits the player's finger and wink thresholds
+import os
+import tempfile
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from src.core.gestures.calibration_profile import CalibrationProfile
+
+# (pose, prompt) in the order CalibrationProfile.fit takes the recordings
+CALIBRATION_STEPS = [
+    ("open_hands", "Show both hands, all fingers up"),
+    ("fists", "Make a fist with both hands"),
+    ("eyes_open", "Look at the camera with both eyes open"),
+    ("winks", "Wink a few times"),
+]
+# Poses recorded with face landmarking on, whatever the validation method
+EYE_POSES = ("eyes_open", "winks")
+# Told to the player for every threshold group CalibrationProfile.fit had to skip
+SKIPPED_PROMPTS = {
+    "fingers": "Not enough hands seen, finger thresholds left as they were",
+    "winks": "No eyes seen, wink thresholds left as they were",
+}
+
+
+class PlayerCalibration(QObject):
+    """Walks the player through the calibration poses, records each one and fits a profile
+
+    Every step shows its prompt, waits `lead_in_ms` for the player to get into
+    the pose, then records the camera's landmarks for `record_ms`.
+    """
+    prompt_changed = pyqtSignal(str)
+    finished = pyqtSignal(object)  # the fitted CalibrationProfile
+    failed = pyqtSignal(str)
+
+    def __init__(self, camera_widget, current_profile=None, lead_in_ms=1500, record_ms=3000,
+                 skipped_notice_ms=2500, parent=None):
+        super().__init__(parent)
+        self.camera_widget = camera_widget
+        # Thresholds kept for the poses that could not be fitted
+        self.current_profile = current_profile
+        self.lead_in_ms = lead_in_ms
+        self.record_ms = record_ms
+        # How long the player is told about thresholds that could not be fitted
+        self.skipped_notice_ms = skipped_notice_ms
+        self.directory = None
+        self.paths = []
+        self._step = 0
+        # Whether face landmarking ran before the eye steps turned it on, None outside of them
+        self._face_mesh_was_enabled = None
+
+    def start(self):
+        self.directory = tempfile.mkdtemp(prefix="drivethru_calibration_")
+        self.paths = [os.path.join(self.directory, f"{pose}.dtlm") for pose, _ in CALIBRATION_STEPS]
+        self._step = 0
+        self.camera_widget.recording_closed.connect(self._recording_closed)
+        self._prompt_step()
+
+    def _prompt_step(self):
+        pose, prompt = CALIBRATION_STEPS[self._step]
+        if pose in EYE_POSES and self._face_mesh_was_enabled is None:
+            # Turned on during the lead-in so the face is tracked once recording starts
+            self._face_mesh_was_enabled = self.camera_widget.is_face_mesh_enabled()
+            self.camera_widget.set_face_mesh_enabled(True)
+        self.prompt_changed.emit(prompt)
+        QTimer.singleShot(self.lead_in_ms, self._record_step)
+
+    def _record_step(self):
+        # Starting the next recording closes the previous one
+        self.camera_widget.start_recording(self.paths[self._step])
+        QTimer.singleShot(self.record_ms, self._next_step)
+
+    def _next_step(self):
+        self._step += 1
+        if self._step < len(CALIBRATION_STEPS):
+            self._prompt_step()
+            return
+        self.camera_widget.stop_recording()
+        self._restore_face_mesh()
+        self.prompt_changed.emit("Calibrating...")
+
+    def _restore_face_mesh(self):
+        if self._face_mesh_was_enabled is not None:
+            self.camera_widget.set_face_mesh_enabled(self._face_mesh_was_enabled)
+            self._face_mesh_was_enabled = None
+
+    def _recording_closed(self, path):
+        # Fit once the worker has closed the last recording
+        if self._step < len(CALIBRATION_STEPS) or path != self.paths[-1]:
+            return
+        self.camera_widget.recording_closed.disconnect(self._recording_closed)
+        self._fit()
+
+    def _fit(self):
+        try:
+            profile = CalibrationProfile.fit(*self.paths, current=self.current_profile)
+        except (OSError, ValueError) as e:
+            print(f"Calibration failed: {e}")
+            self.failed.emit(str(e))
+            return
+        finally:
+            self._remove_recordings()
+        print(f"Calibrated profile: {profile.to_dict()}")
+        if not profile.skipped:
+            self.finished.emit(profile)
+            return
+        print(f"Calibration kept the previous {', '.join(profile.skipped)} thresholds")
+        self.prompt_changed.emit("\n".join(SKIPPED_PROMPTS[group] for group in profile.skipped))
+        QTimer.singleShot(self.skipped_notice_ms, lambda: self.finished.emit(profile))
+
+    def _remove_recordings(self):
+        # A leftover temp file must never keep the game paused
+        try:
+            for path in self.paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            os.rmdir(self.directory)
+        except OSError as e:
+            print(f"Could not remove calibration recordings in {self.directory}: {e}")
@@ -0,0 +1,62 @@
+# low overhead timing of the camera pipeline stages
+import atexit
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class StageTimer:
+    """Keeps a rolling window of latencies per stage and reports p50/p95/p99"""
+    def __init__(self, window=1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def record(self, stage, start):
+        """Record the time elapsed since `start` (a time.perf_counter() value) for a stage"""
+        self.record_ms(stage, (time.perf_counter() - start) * 1000)
+
+    def record_ms(self, stage, elapsed_ms):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(elapsed_ms)
+
+    def percentiles(self):
+        """Returns {stage: {count, p50, p95, p99, max}} in milliseconds over the rolling window"""
+        with self._lock:
+            snapshot = {stage: np.asarray(samples) for stage, samples in self._samples.items()}
+        report = {}
+        for stage, samples in snapshot.items():
+            if samples.size == 0:
+                continue
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            report[stage] = {
+                "count": int(samples.size),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(samples.max())
+            }
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def dump(self, path):
+        """Write the current percentiles to a JSON file"""
+        with open(path, "w") as file:
+            json.dump(self.percentiles(), file, indent=2)
+
+    def dump_on_exit(self, path):
+        """Write the percentiles to `path` when the interpreter exits"""
+        atexit.register(self.dump, path)
+
+    def cancel_dump_on_exit(self):
+        """Undo dump_on_exit, e.g. once the owner has dumped and is going away"""
+        atexit.unregister(self.dump)
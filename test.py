@@ -1,3 +1,4 @@
+import os
 import sys
 import time
 import random
@@ -18,6 +19,8 @@ from src.core.logic.elaborate_answer import ElaborateAnswer
 from .drivethru.whole_drivehtru_window import WholeDriveThruWindow
 from .kitchen.kitchen import Kitchen
 from src.components.camera import Camera_Widget
+from src.core.gestures.gesture_code import GestureCode
+from src.core.logic.player_calibration import PlayerCalibration
 
 class Test(QWidget):
     def __init__(self, auth_handler, current_game_mode=None):
@@ -99,8 +102,16 @@ class Test(QWidget):
 
         self.game_start_time = QTime.currentTime()
 
+        # Calibration of the player's finger and wink thresholds, started with C in the kitchen
+        self.calibration = None
+        self.calibration_label = OverlayLabel("", self, get_resource_path("img/timer.jpg"))
+        self.calibration_label.resize(700, 80)
+        self.calibration_label.move((self.screen_width - 700) // 2, 150)
+        self.calibration_label.hide()
+
     def _configure_initial_state(self):
         self.had_active_order = False
+        self.validate_button_text = "Validate"
         self.remaining_time = 0
         self.camera_widget.hide()
         self.elaborate_answer.hide()
@@ -127,20 +138,31 @@ class Test(QWidget):
 
     def _configure_mode_settings(self):
         mode_configs = {
-            "reverse": {"time": 20, "button_text": "Wink to validate", "hands": 2, "enabled": False},
-            "default": {"time": 20, "button_text": "Validate", "hands": 1, "enabled": True},
-            "double_trouble": {"time": 60, "button_text": "Wink to validate", "hands": 2, "enabled": False},
-            "speedrun": {"time": 10, "button_text": "Validate", "hands": 1, "enabled": True}
+            "reverse": {"time": 20, "button_text": "Wink to validate", "hands": 2, "enabled": False,
+                        "validation": "wink", "required_hands": 1},
+            "default": {"time": 20, "button_text": "Validate", "hands": 1, "enabled": True,
+                        "validation": "click", "required_hands": 1},
+            "double_trouble": {"time": 60, "button_text": "Wink to validate", "hands": 2, "enabled": False,
+                               "validation": "wink", "required_hands": 2},
+            "speedrun": {"time": 10, "button_text": "Validate", "hands": 1, "enabled": True,
+                         "validation": "click", "required_hands": 1}
         }
         config = mode_configs.get(self.current_game_mode, mode_configs["default"])
+        validation, button_text = config["validation"], config["button_text"]
+        if validation == "wink" and os.getenv("DRIVETHRU_HOLD_VALIDATION"):
+            # Hands-only alternative to winking, without face mesh next to the hands model
+            validation, button_text = "hold", "Hold to validate"
 
         self._set_order_time(config["time"])
-        self.validate_code_button.setText(config["button_text"])
+        self.validate_code_button.setText(button_text)
         self.validate_code_button.setEnabled(config["enabled"])
+        self.validate_button_text = button_text
+        # required_hands: reverse answers up to 5 take a single hand
+        self.camera_widget.set_validation_method(validation, config["required_hands"])
         if config["hands"] > 1 and hasattr(self.camera_widget, 'update_number_of_hands'):
             self.camera_widget.update_number_of_hands(config["hands"])
 
-        self.code = self.decimal_code if self.current_game_mode == "reverse" else self.decimal_to_binary_array(self.decimal_code)
+        self.code = self.decimal_code
         self.image_index = 0
         self.dec_imal_code = 0
         if self.current_game_mode == "double_trouble":
@@ -154,7 +176,7 @@ class Test(QWidget):
     def setup_camera(self):
         camera_width = self.camera_widget.width()
         self.camera_widget.move(self.screen_width - camera_width - 50, (self.screen_height - self.camera_widget.height()) // 2 - 100)
-        self.camera_widget.validation_method = "wink" if self.current_game_mode in ["double_trouble", "reverse"] else "click"
+        self.camera_widget.set_calibration_profile(self.auth_handler.get_calibration_profile())
         self.camera_widget.hide()
 
     def resizeEvent(self, event):
@@ -165,11 +187,42 @@ class Test(QWidget):
         self._raise_elements()
 
     def keyPressEvent(self, event):
-        if event.key() == Qt.Key.Key_Escape and self.elaborate_answer.isHidden():
+        if event.key() == Qt.Key.Key_Escape and self.elaborate_answer.isHidden() and self.calibration is None:
             self.last_pause_time = QTime.currentTime()
             self.toggle_pause(pause_overlay=True)
+        elif event.key() == Qt.Key.Key_C and self.current_scene == "kitchen" and self.game_playing \
+                and self.elaborate_answer.isHidden() and self.calibration is None:
+            self.start_calibration()
         super().keyPressEvent(event)
 
+    def start_calibration(self):
+        """Pause the game and fit the player's thresholds from a few recorded poses"""
+        self.toggle_pause()
+        # The calibration poses must not count as a held answer afterwards
+        self.camera_widget.hold_confirmer.reset()
+        self.calibration = PlayerCalibration(self.camera_widget, self.auth_handler.get_calibration_profile(),
+                                             parent=self)
+        self.calibration.prompt_changed.connect(self.calibration_label.setText)
+        self.calibration.finished.connect(self._calibration_finished)
+        self.calibration.failed.connect(self._calibration_failed)
+        self.calibration_label.show()
+        self.calibration_label.raise_()
+        self.calibration.start()
+
+    def _calibration_finished(self, profile):
+        self.auth_handler.save_calibration_profile(profile)
+        self.camera_widget.set_calibration_profile(profile)
+        self._end_calibration()
+
+    def _calibration_failed(self, message):
+        self._end_calibration()
+
+    def _end_calibration(self):
+        self.calibration.deleteLater()
+        self.calibration = None
+        self.calibration_label.hide()
+        self.toggle_pause()
+
     def toggle_pause(self, pause_overlay=None):
         current_time = QTime.currentTime()
         if self.game_playing:
@@ -210,6 +263,13 @@ class Test(QWidget):
         self.menu.show()
         self.close()
 
+    def closeEvent(self, event):
+        # The camera widget is a child and gets no close event of its own,
+        # stop its threads so its camera and models are released
+        self.update_timer.stop()
+        self.camera_widget.shutdown()
+        super().closeEvent(event)
+
     def toggle_scenes(self):
         self.elaborate_answer.hide()
         if self.current_scene == "drive_thru":
@@ -225,7 +285,7 @@ class Test(QWidget):
 
     def _update_kitchen_ui(self):
         if self.remaining_time > 0:
-            self.validate_code_button.setText("Wink to Validate" if self.current_game_mode == "double_trouble" else "Validate")
+            self.validate_code_button.setText(self.validate_button_text)
             self.validate_code_button.show()
             self.had_active_order = True
         else:
@@ -257,7 +317,7 @@ class Test(QWidget):
     def randomize_customer_order(self):
         self.customer_order.randomize_order_image(self.daily_deals.images)
         self.find_decimal_code()
-        self.code = self.decimal_code if self.current_game_mode == "reverse" else self.decimal_to_binary_array(self.decimal_code)
+        self.code = self.decimal_code
         self.customer_order.update_menu_image()
         self.camera_widget.update_true_code(self.code)
 
@@ -309,20 +369,16 @@ class Test(QWidget):
         self.update_score_display()
 
     def find_decimal_code(self):
-        self.decimal_code = 0
+        self.decimal_code = GestureCode(0)
         for i, image in enumerate(self.daily_deals.images):
             if str(image) == self.customer_order.order:
                 self.image_index = i
                 self.decimal_code = self.daily_deals.codes[i]
-                print(f"@@@@@@@@@@@@@@DECIMAL CODE: {self.decimal_code}")
+                print(f"@@@@@@@@@@@@@@DECIMAL CODE: {int(self.decimal_code)}")
                 break
         else:
             print("Warning: No matching image found for customer order.")
 
-    def decimal_to_binary_array(self, decimal):
-        binary = bin(decimal)[2:].zfill(5)
-        return [int(bit) for bit in binary]
-
     def validate_current_code(self):
         if self.elaborate_answer.isVisible():
             return
@@ -331,10 +387,9 @@ class Test(QWidget):
             current_code = self.camera_widget.get_currently_shown_code()
         else:
             current_code = None
-        formatted_true_code = ''.join(map(str, self.code)) if isinstance(self.code, list) else str(self.code)
-        print(f"CURRENT CODE: {current_code} TRUE CODE: {formatted_true_code} REMAINING TIME: {self.remaining_time}")
+        print(f"CURRENT CODE: {current_code} TRUE CODE: {self.code} REMAINING TIME: {self.remaining_time}")
         self.elaborate_answer.elaborate(
-            true_code=formatted_true_code,
+            true_code=self.code,
             current_code=current_code,
             remaining_time=self.remaining_time,
             current_game_mode=self.current_game_mode
@@ -1,69 +1,202 @@
-import cv2
-import mediapipe as mp
 import numpy as np
 
-mp_face_mesh = mp.solutions.face_mesh
+from src.core.gestures.model_registry import model_registry
+from src.core.gestures.eye_region_tracker import EyeRegionTracker
 
 # Eye indices from MediaPipe FaceMesh model
 LEFT_EYE = [362, 385, 387, 263, 373, 380]
 RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+# Both eyes in the order the EAR logic and the landmark recordings use
+EYE_LANDMARKS = LEFT_EYE + RIGHT_EYE
+
+
+# Rows of the 12 eye points forming the EAR distances, (eye, distance, end):
+# the two vertical distances p2-p6 and p3-p5, then the horizontal p1-p4
+EAR_PAIRS = np.array([
+    [[1, 5], [2, 4], [0, 3]],
+    [[7, 11], [8, 10], [6, 9]],
+])
+
+
+def eye_aspect_ratios(eyes, width, height):
+    """Left and right EAR of (N, 12, 2+) normalized EYE_LANDMARKS points, shape (N, 2)"""
+    points = np.asarray(eyes, dtype=np.float32)[:, EAR_PAIRS, :2] * np.array([width, height], dtype=np.float32)
+    lengths = np.linalg.norm(points[..., 0, :] - points[..., 1, :], axis=-1)
+    return (lengths[..., 0] + lengths[..., 1]) / (2.0 * np.maximum(lengths[..., 2], 1e-6))
+
+# How FaceMesh is run to find the eyes
+WINK_MODES = {
+    # Iris-refined 478 point mesh on the full frame, tracked from frame to frame
+    "full": {"refine_landmarks": True, "eye_region": False, "static_image_mode": False},
+    # Face found once on the full frame, then a 468 point mesh on a crop
+    # around the eyes only, without the iris refinement. The crop moves, so
+    # every image is searched on its own: a video-mode graph would apply
+    # last frame's face ROI to an image in other coordinates and lose the face
+    "eye_region": {"refine_landmarks": False, "eye_region": True, "static_image_mode": True},
+}
+
+
+class WinkEvent:
+    """A confirmed wink, times are frame timestamps on the frame source's clock"""
+    def __init__(self, onset, confirmed_at, closed_eye, onset_captured_at=None):
+        # First frame with only one eye closed, and the frame that confirmed it
+        self.onset = onset
+        self.confirmed_at = confirmed_at
+        self.closed_eye = closed_eye  # "left" or "right"
+        # time.monotonic() at which the onset frame was captured, when known
+        self.onset_captured_at = onset_captured_at
+
+    @property
+    def confirmation_ms(self):
+        return (self.confirmed_at - self.onset) * 1000
+
 
 class WinkDetector:
-    def __init__(self):
-        self.face_mesh = mp_face_mesh.FaceMesh(
+    def __init__(self, mode="full", modes=WINK_MODES):
+        # Mode name -> FaceMesh configuration, WINK_MODES unless benchmarking variants
+        self.modes = modes
+        self.mode = None
+        self.face_mesh = None
+        self.eye_region_tracker = EyeRegionTracker()
+        self.set_mode(mode)
+
+        self.EAR_THRESHOLD = 0.2
+        # The last confirmed WinkEvent on this frame, None otherwise
+        self.winking = None
+
+        # Windows in milliseconds of frame time, so they hold at any frame rate
+        self.confirm_ms = 66     # One eye has to stay closed this long
+        self.gap_ms = 70         # An open-eye gap this short does not cancel a wink
+        self.cooldown_ms = 330   # No new wink this long after one was confirmed
+
+        self._onset = None              # timestamp the current wink started
+        self._onset_captured_at = None
+        self._last_closed = None        # timestamp of the last one-eye-closed frame
+        self._cooldown_until = None
+
+        # (x, y, z) of the EYE_LANDMARKS from the last processed frame, None without a face
+        self.last_eye_points = None
+
+        # Reused every frame: the eye points, the gathered EAR point pairs and
+        # their scaled differences, distances and the two ratios
+        self._eye_points = np.empty((len(EYE_LANDMARKS), 3), dtype=np.float32)
+        self._pairs = np.empty(EAR_PAIRS.shape + (3,), dtype=np.float32)
+        self._deltas = np.empty(EAR_PAIRS.shape[:2] + (2,), dtype=np.float32)
+        self._lengths = np.empty(EAR_PAIRS.shape[:2], dtype=np.float32)
+        self._ears = np.empty(2, dtype=np.float32)
+        self._scale = np.empty(2, dtype=np.float32)
+
+    def set_mode(self, mode):
+        """Switch to one of the WINK_MODES, the counters and thresholds are kept
+
+        None runs no FaceMesh at all, face landmarks then come from another
+        model through update_from_face.
+        """
+        if mode == self.mode:
+            return
+        if self.face_mesh is not None:
+            model_registry.release(self.face_mesh)
+            self.face_mesh = None
+        self.mode = mode
+        self.eye_region_tracker.reset()
+        if mode is None:
+            return
+        config = self.modes[mode]
+        self.face_mesh = model_registry.face_mesh(
+            self,
+            static_image_mode=config["static_image_mode"],
             max_num_faces=1,
-            refine_landmarks=True,
+            refine_landmarks=config["refine_landmarks"],
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-        self.EAR_THRESHOLD = 0.2
-        self.winking = False
-
-        self.wink_counter = 0
-        self.max_wink_frames = 3   # Require blink for 3 consecutive frames
-        self.debounce_frames = 10  # Debounce after detection
-
-    def _calculate_ear(self, eye_points, landmarks, width, height):
-        coords = [(
-            int(landmarks[i].x * width), 
-            int(landmarks[i].y * height)) 
-            for i in eye_points]
-        A = self._distance(coords[1], coords[5])
-        B = self._distance(coords[2], coords[4])
-        C = self._distance(coords[0], coords[3])
-        ear = (A + B) / (2.0 * C)
-        return ear
-
-    def _distance(self, p1, p2):
-        return np.linalg.norm(np.array(p1) - np.array(p2))
+
+    def calculate_ears(self, eye_points, width, height):
+        """Left and right EAR of a float32 (12, 3) array of normalized eye points, without allocating
+
+        The returned array is reused by the next call.
+        """
+        self._scale[0] = width
+        self._scale[1] = height
+        # One gather of every point pair of both eyes
+        np.take(eye_points, EAR_PAIRS, axis=0, out=self._pairs, mode="clip")
+        np.subtract(self._pairs[..., 0, :2], self._pairs[..., 1, :2], out=self._deltas)
+        np.multiply(self._deltas, self._scale, out=self._deltas)
+        np.hypot(self._deltas[..., 0], self._deltas[..., 1], out=self._lengths)
+        # Degenerate landmarks (eye corners on top of each other) give a huge ratio, not inf
+        np.maximum(self._lengths[:, 2], 1e-6, out=self._lengths[:, 2])
+        np.add(self._lengths[:, 0], self._lengths[:, 1], out=self._ears)
+        np.divide(self._ears, self._lengths[:, 2], out=self._ears)
+        np.multiply(self._ears, 0.5, out=self._ears)
+        return self._ears
 
     def detect_wink(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-
-        h, w, _ = frame.shape
-        current_wink = False
-
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0]
-
-            left_ear = self._calculate_ear(LEFT_EYE, face_landmarks.landmark, w, h)
-            right_ear = self._calculate_ear(RIGHT_EYE, face_landmarks.landmark, w, h)
-
-            # Only one eye closed → possible wink
-            if (left_ear < self.EAR_THRESHOLD) != (right_ear < self.EAR_THRESHOLD):
-                self.wink_counter += 1
-                if self.wink_counter >= self.max_wink_frames:
-                    current_wink = True
-                    self.wink_counter = -self.debounce_frames  # Start debounce cooldown
-            else:
-                if self.wink_counter > 0:
-                    self.wink_counter -= 1  # Reset counter if no wink detected
+        """Detect a wink on a FrameContext, reusing its RGB conversion
+
+        Returns a WinkEvent on the frame a wink is confirmed, None otherwise.
+        """
+        eye_region = self.modes[self.mode]["eye_region"]
+        image = self.eye_region_tracker.crop(frame.inference_rgb) if eye_region else frame.inference_rgb
+        results = self.face_mesh.process(image)
+        return self.update_from_face(results.multi_face_landmarks, frame, eye_region)
+
+    def update_from_face(self, multi_face_landmarks, frame, eye_region=False):
+        """Advance the wink logic from face landmarks found on a FrameContext (None without a face)
+
+        `eye_region` tells that the landmarks are relative to the eye region crop.
+        """
+        # Landmarks are normalized, scale them to the full frame so the
+        # eye aspect ratio does not depend on the inference resolution
+        h, w = frame.height, frame.width
+
+        eye_points = None
+        if multi_face_landmarks:
+            landmarks = multi_face_landmarks[0].landmark
+            eye_points = self._eye_points
+            eye_points[:] = [(landmarks[i].x, landmarks[i].y, landmarks[i].z) for i in EYE_LANDMARKS]
+        if eye_region:
+            # Eye points come back relative to the crop, map them to the full frame
+            self.eye_region_tracker.update(eye_points, w, h)
+        self.last_eye_points = eye_points
+        return self.update_from_eyes(eye_points, w, h, frame.timestamp, frame.captured_at)
+
+    def update_from_eyes(self, eye_points, width, height, timestamp, captured_at=None):
+        """Advance the wink logic from the 12 normalized EYE_LANDMARKS points (None without a face)
+
+        Used by detect_wink and to replay recorded eye landmarks without FaceMesh.
+        Only call it for frames the face was looked for: a frame FaceMesh
+        skipped is not a frame without a face, leave it out entirely.
+        `timestamp` is the frame time in seconds, returns a WinkEvent or None.
+        """
+        event = None
+
+        if eye_points is None:
+            # No face detected: forget any wink in progress, a wink just
+            # confirmed keeps its cooldown through a short face loss
+            self._onset = None
+            self._last_closed = None
         else:
-            # No face detected: reset counter
-            self.wink_counter = 0
-        self.winking = current_wink
-        return self.winking
+            left_ear, right_ear = self.calculate_ears(eye_points, width, height)
+            left_closed = left_ear < self.EAR_THRESHOLD
+            right_closed = right_ear < self.EAR_THRESHOLD
+
+            if self._cooldown_until is not None and timestamp < self._cooldown_until:
+                pass
+            elif left_closed != right_closed:
+                # Only one eye closed → possible wink
+                if self._onset is None or (timestamp - self._last_closed) * 1000 > self.gap_ms:
+                    self._onset = timestamp
+                    self._onset_captured_at = captured_at
+                self._last_closed = timestamp
+                if (timestamp - self._onset) * 1000 >= self.confirm_ms:
+                    event = WinkEvent(self._onset, timestamp, "left" if left_closed else "right",
+                                      self._onset_captured_at)
+                    self._onset = None
+                    self._cooldown_until = timestamp + self.cooldown_ms / 1000
+            elif self._onset is not None and (timestamp - self._last_closed) * 1000 > self.gap_ms:
+                self._onset = None
+        self.winking = event
+        return event
 
     def release(self):
-        self.face_mesh.close()
\ No newline at end of file
+        self.set_mode(None)
\ No newline at end of file